@@ -0,0 +1,380 @@
+"""
+감시 파이프라인 오프라인 벤치마크 (외부 서비스 대역 + 합성 종목)
+
+야후/구글 뉴스/Finviz/JSONBin/텔레그램/경제 일정/실적 캘린더를 로컬 대역으로 바꿔 감시 사이클을 돌리고
+사이클 시간, 사이클당 요청 수(엔드포인트별), 최대 메모리, 발신 알림 수를 출력한다.
+뉴스/텔레그램/JSONBin/Finviz/경제 일정/실적 캘린더는 HTTP 대역 서버(DEBRIEF_*_BASE 환경변수로 연결),
+야후(yf.download)와 번역(GoogleTranslator)은 프로세스 안 대역으로 바꾼다.
+지연과 오류는 --latency / --jitter / --error-rate 로 모든 대역에 같이 주입한다.
+
+    python bench.py                                    # 10/100/1000 종목 x thread/async, 콜드 1회 + 웜 2회
+    python bench.py --sizes 100 --modes async --latency 0.05 --error-rate 0.05 --json out.json
+    python bench.py --serve --port 8790                # 대역 서버만 -> 출력된 환경변수로 streamlit run app.py
+"""
+import argparse
+import atexit
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+
+RSS_ITEMS = 3            # 피드 한 건당 기사 수
+BENCH_TOKEN = 'BENCH'    # 대역 텔레그램 봇 토큰
+BENCH_CHAT = '1'
+BENCH_BIN = 'bench'
+
+class Injector:
+    """대역 요청마다 지연(latency + 0~jitter)을 주고 error_rate 확률로 실패시킴. 엔드포인트별 요청/오류 수 집계"""
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.errors = Counter()
+
+    def hit(self, route, n=1):
+        """route 요청 n건(동시에 나간 것으로 보고 지연은 한 번)을 기록 -> 그중 실패시킬 건수"""
+        with self.lock:
+            self.counts[route] += n
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            failed = sum(self.rng.random() < self.error_rate for _ in range(n))
+            self.errors[route] += failed
+        if delay: time.sleep(delay)
+        return failed
+
+    def take(self):
+        """지금까지의 (요청 수, 오류 수)를 꺼내고 초기화"""
+        with self.lock:
+            counts, errors = dict(self.counts), dict(self.errors)
+            self.counts.clear(); self.errors.clear()
+        return counts, errors
+
+# ---------------------------------------------------------
+# HTTP 대역 서버 (뉴스 RSS / 텔레그램 / JSONBin / Finviz / 경제 일정 / 실적 캘린더)
+# ---------------------------------------------------------
+class StandInServer:
+    def __init__(self, injector, host='127.0.0.1', port=0, fresh=1):
+        self.injector = injector
+        self.fresh = fresh        # 사이클마다 피드별로 새로 올라오는 기사 수
+        self.generation = 0
+        self.record = None        # JSONBin 레코드
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """app.py / python -m debrief 가 이 서버를 보게 하는 환경변수"""
+        return {'DEBRIEF_NEWS_BASE': self.base, 'DEBRIEF_TELEGRAM_API': self.base,
+                'DEBRIEF_JSONBIN_API': f"{self.base}/v3", 'DEBRIEF_FINVIZ_BASE': self.base,
+                'DEBRIEF_ECO_URL': f"{self.base}/eco.xml", 'DEBRIEF_EARNINGS_URL': f"{self.base}/earnings"}
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name="Bench_StandIn").start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown(); self.httpd.server_close()
+
+    def next_cycle(self):
+        with self.lock: self.generation += 1
+
+    # --- 엔드포인트 ---
+    def rss(self, query, headers):
+        q = query.get('q', [''])[0]
+        ticker = q.split(' ')[0]
+        sec = 'SEC Filing' in q
+        with self.lock: top = self.generation * self.fresh + RSS_ITEMS
+        etag = f'"{"sec" if sec else "news"}-{ticker}-{top}"'
+        if headers.get('If-None-Match') == etag: return 304, 'application/rss+xml', b'', {'ETag': etag}
+        now = time.time()
+        items = "".join(
+            f"<item><title>{ticker} {'8-K filing' if sec else 'shares move on headline'} #{k} - Bench Wire</title>"
+            f"<link>{self.base}/{'sec' if sec else 'news'}/{ticker}/{k}</link>"
+            f"<pubDate>{formatdate(now - (top - k) * 60, usegmt=True)}</pubDate></item>"
+            for k in range(top, top - RSS_ITEMS, -1))
+        body = f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{ticker}</title>{items}</channel></rss>'
+        return 200, 'application/rss+xml', body.encode(), {'ETag': etag}
+
+    def telegram(self, failed):
+        if failed:
+            return 429, 'application/json', json.dumps({"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                                        "parameters": {"retry_after": 1}}).encode(), {}
+        return 200, 'application/json', b'{"ok": true, "result": {}}', {}
+
+    def jsonbin(self, method, body):
+        with self.lock:
+            if method == 'PUT':
+                self.record = json.loads(body or b'{}')
+            elif self.record is None:
+                return 404, 'application/json', b'{"message": "Bin not found"}', {}
+            return 200, 'application/json', json.dumps({"record": self.record, "metadata": {}}).encode(), {}
+
+    @staticmethod
+    def finviz(query):
+        ticker = query.get('t', [''])[0]
+        cells = {'Market Cap': '12.34B', 'P/E': '21.5', 'Forward P/E': '18.2', 'EPS (ttm)': '3.10', 'Earnings': 'Oct 28 AMC',
+                 'Target Price': '123.00', 'Recom': '2.10', 'Short Float': '3.2%', 'Ticker': ticker}
+        row = "".join(f"<td>{k}</td><td><b>{v}</b></td>" for k, v in cells.items())
+        return 200, 'text/html', f'<html><body><table class="snapshot-table2"><tr>{row}</tr></table></body></html>'.encode(), {}
+
+    @staticmethod
+    def eco():
+        today = pd.Timestamp.now(tz='UTC').normalize()
+        monday = today - pd.Timedelta(days=today.weekday())
+        rows = [("CPI m/m", 1, "12:30pm", "High"), ("Core Retail Sales m/m", 2, "12:30pm", "High"),
+                ("Unemployment Claims", 3, "12:30pm", "Medium"), ("Non-Farm Employment Change", 4, "12:30pm", "High"),
+                ("FOMC Member Speaks", today.weekday(), "All Day", "Medium")]
+        events = "".join(
+            f"<event><title>{title}</title><country>USD</country><date><![CDATA[{(monday + pd.Timedelta(days=d)).strftime('%m-%d-%Y')}]]></date>"
+            f"<time>{t}</time><impact>{impact}</impact><forecast>0.3%</forecast><previous>0.2%</previous></event>"
+            for title, d, t, impact in rows)
+        return 200, 'text/xml', f'<?xml version="1.0" encoding="windows-1252"?><weeklyevents>{events}</weeklyevents>'.encode(), {}
+
+    @staticmethod
+    def earnings(query):
+        # 나스닥 실적 캘린더 형식 - 합성 종목(접두어 2글자 + 4자리)을 날짜마다 일부씩 배정
+        day = pd.Timestamp(query.get('date', [''])[0] or 'today')
+        rows = [{"symbol": f"{a}{b}{k:04d}", "time": "time-pre-market" if k % 2 else "time-after-hours"}
+                for a in "ABC" for b in "AB" for k in range(day.dayofyear % 50, 1000, 50)]
+        return 200, 'application/json', json.dumps({"data": {"rows": rows}}).encode(), {}
+
+    def route(self, method, target, headers, body):
+        parts = urlsplit(target)
+        path, query = parts.path, parse_qs(parts.query)
+        if path.startswith('/rss/'): name = 'news'
+        elif path.endswith('/sendMessage'): name = 'telegram'
+        elif path.startswith('/v3/b/'): name = 'jsonbin'
+        elif path == '/quote.ashx': name = 'finviz'
+        elif path == '/eco.xml': name = 'eco'
+        elif path == '/earnings': name = 'earnings'
+        else: return 404, 'text/plain', b'not found', {}
+        failed = self.injector.hit(name)
+        if name == 'telegram': return self.telegram(failed)
+        if failed: return 503, 'text/plain', b'injected error', {}
+        if name == 'news': return self.rss(query, headers)
+        if name == 'jsonbin': return self.jsonbin(method, body)
+        if name == 'finviz': return self.finviz(query)
+        if name == 'earnings': return self.earnings(query)
+        return self.eco()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive (실서비스처럼 연결 재사용)
+
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                status, ctype, payload, extra = server.route(self.command, self.path, self.headers, body)
+                self.send_response(status)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(payload)))
+                for k, v in extra.items(): self.send_header(k, v)
+                self.end_headers()
+                if payload: self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = _serve
+
+            def log_message(self, *args): pass
+
+        return Handler
+
+# ---------------------------------------------------------
+# 프로세스 안 대역 (야후 시세 / 번역)
+# ---------------------------------------------------------
+class YahooFixture:
+    """yf.download 대역: 종목별 고정 시드 랜덤워크 일봉 + 호출마다 흔들리는 현재가 (급등락/지표 알림이 나오도록)"""
+    def __init__(self, injector, move=0.025, seed=0):
+        self.injector = injector
+        self.move = move                               # 현재가 변동폭(표준편차, 전일 종가 대비)
+        self.rng = np.random.default_rng(seed)
+        self.threads = (os.cpu_count() or 1) * 2       # yfinance는 종목마다 요청 1건을 이만큼씩 병렬로 보냄
+        self.days = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=400)
+        self.paths = {}
+        self.lock = threading.Lock()
+
+    def _path(self, ticker):
+        if ticker not in self.paths:
+            rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+            self.paths[ticker] = 20 + rng.uniform(0, 480) * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(self.days))))
+        return self.paths[ticker]
+
+    def download(self, tickers, interval='1d', period=None, start=None, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        failed = 0
+        for i in range(0, len(tickers), self.threads):
+            failed += self.injector.hit('yahoo', len(tickers[i:i + self.threads]))
+        with self.lock:
+            paths = np.column_stack([self._path(t) for t in tickers])
+            shock = 1 + self.rng.normal(0, self.move, len(tickers))
+        if interval == '1d':
+            index = self.days
+            close = paths.copy(); close[-1] = close[-2] * shock
+        else:
+            end = pd.Timestamp.now(tz='America/New_York').floor(interval.replace('m', 'min'))
+            index = pd.date_range(end=end, periods=78, freq=interval.replace('m', 'min'))
+            close = paths[-2] * np.linspace(1, shock, len(index))
+        frame = pd.DataFrame(close, index=index, columns=tickers)
+        if start is not None:
+            start = pd.Timestamp(start)
+            if start.tzinfo is None and index.tz is not None: start = start.tz_localize(index.tz)
+            elif start.tzinfo is not None and index.tz is None: start = start.tz_localize(None)
+            frame = frame[frame.index >= start]
+        if failed:  # 실패한 종목은 yfinance처럼 빈 열
+            frame[list(np.random.default_rng().choice(tickers, failed, replace=False))] = np.nan
+        volume = frame.mul(0).add(1e6) * (1 + np.abs(self.rng.normal(0, 1, frame.shape)))
+        fields = {'Open': frame.shift(1).fillna(frame), 'High': frame * 1.01, 'Low': frame * 0.99, 'Close': frame, 'Volume': volume}
+        return pd.concat(fields, axis=1)
+
+class TranslatorFixture:
+    """GoogleTranslator 대역 (줄 단위로 접두어만 붙여 돌려줌)"""
+    def __init__(self, injector, source='auto', target='ko'):
+        self.injector, self.target = injector, target
+
+    def __call__(self, source='auto', target='ko'):
+        return TranslatorFixture(self.injector, source, target)
+
+    def translate(self, text):
+        if self.injector.hit('translate'): raise RuntimeError("injected translate error")
+        return "\n".join(f"[{self.target}] {line}" for line in text.split("\n"))
+
+# ---------------------------------------------------------
+# 실행
+# ---------------------------------------------------------
+def load_app(workdir, env):
+    """대역 서버를 보도록 환경변수/secrets.toml을 맞춘 뒤 debrief 패키지를 불러옴 (봇 폴링/UI 없이)"""
+    os.environ.update(env)  # 엔드포인트 주소는 import 시점에 읽음
+    os.makedirs(os.path.join(workdir, '.streamlit'), exist_ok=True)
+    with open(os.path.join(workdir, '.streamlit', 'secrets.toml'), 'w', encoding='utf-8') as f:
+        f.write(f'[jsonbin]\nbin_id = "{BENCH_BIN}"\nmaster_key = "bench"\n\n'
+                f'[telegram]\nbot_token = "{BENCH_TOKEN}"\nchat_id = "{BENCH_CHAT}"\n')
+    os.chdir(workdir)  # 설정/로그/봉 저장소/번역 캐시 파일은 임시 작업 폴더에
+    import debrief.config, debrief.monitor, debrief.net, debrief.outbox, debrief.prices, debrief.schedule, debrief.translate
+    return debrief
+
+def drain_outbox(outbox, timeout):
+    started = time.perf_counter()
+    while outbox.stats()['depth'] and time.perf_counter() - started < timeout: time.sleep(0.05)
+    return time.perf_counter() - started
+
+def synthetic_chats(app, watchlist, count, seed):
+    """주 채팅방 외 count개 채팅방 - 각자 목록의 절반을 무작위로 구독 (옵션은 기본값)"""
+    rng = random.Random(seed)
+    chats = {}
+    for i in range(count):
+        chat = app.config.default_chat(f"bench-{i}")
+        chat['tickers'] = {t: dict(app.config.DEFAULT_OPTS) for t in rng.sample(sorted(watchlist), len(watchlist) // 2)}
+        chats[str(1000 + i)] = chat
+    return chats
+
+def run_case(app, server, injector, size, mode, cycles, prefix, trace, drain, rps, chats=0, seed=0):
+    """종목 size개 (모든 감지 옵션 켬)로 cycles번 감시 사이클 -> 사이클별 결과"""
+    opts = {k: True for k in app.config.DEFAULT_OPTS}
+    watchlist = {f"{prefix}{i:04d}": dict(opts) for i in range(size)}
+    subs = synthetic_chats(app, watchlist, chats, seed)
+    app.config.get_config_store().update(lambda c: c.update(tickers=watchlist, chats=subs, system_active=True, eco_mode=True, quote_stream=False))
+    monitor = app.monitor.Monitor()
+    if rps: monitor.limiter = app.schedule.RateLimiter(rps)
+    else: monitor.limiter = app.schedule.RateLimiter(1e9)  # 대역 상대라 요청 간격 제한 없이 파이프라인 자체만 측정
+    outbox = app.outbox.get_telegram_outbox()
+    injector.take()
+    rows = []
+    for cycle in range(cycles):
+        server.next_cycle()
+        if trace: tracemalloc.reset_peak()
+        started = time.perf_counter()
+        messages = monitor.run_once(mode=mode)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+        drained = drain_outbox(outbox, drain)
+        counts, errors = injector.take()
+        rows.append({'size': size, 'mode': mode, 'chats': chats + 1, 'cycle': 'cold' if cycle == 0 else f"warm{cycle}",
+                     'seconds': round(elapsed, 3), 'requests': counts, 'errors': errors,
+                     'peak_mb': round(peak / 2**20, 1) if peak is not None else None,
+                     'alerts': len(messages), 'drain_seconds': round(drained, 2)})
+    monitor.executor.shutdown(wait=True)
+    return rows
+
+def format_row(r):
+    reqs = " · ".join(f"{k} {v}" for k, v in sorted(r['requests'].items(), key=lambda kv: -kv[1]))
+    errs = sum(r['errors'].values())
+    peak = f"{r['peak_mb']:7.1f}MB" if r['peak_mb'] is not None else "      -  "
+    return (f"{r['size']:>5} {r['mode']:<6} x{r['chats']:<3} {r['cycle']:<5} {r['seconds']:8.3f}s  peak {peak}  alerts {r['alerts']:>4}  "
+            f"req {sum(r['requests'].values()):>5} ({reqs})" + (f"  err {errs}" if errs else ""))
+
+def main():
+    ap = argparse.ArgumentParser(description="DeBrief 감시 파이프라인 오프라인 벤치마크")
+    ap.add_argument('--sizes', default='10,100,1000', help="합성 종목 수 (쉼표 구분)")
+    ap.add_argument('--modes', default='thread,async', help="감시 모드 (thread, async)")
+    ap.add_argument('--chats', type=int, default=0, help="주 채팅방 외 추가 구독 채팅방 수 (각자 목록의 절반을 구독)")
+    ap.add_argument('--cycles', type=int, default=3, help="사이클 수 (첫 회는 콜드)")
+    ap.add_argument('--latency', type=float, default=0.0, help="대역 응답 지연(초)")
+    ap.add_argument('--jitter', type=float, default=0.0, help="추가 지연 상한(초, 균등 분포)")
+    ap.add_argument('--error-rate', type=float, default=0.0, help="요청 실패 확률 (텔레그램은 429, 나머지는 503/빈 시세)")
+    ap.add_argument('--fresh', type=int, default=1, help="사이클마다 피드별 새 기사 수 (0이면 웜 사이클은 304)")
+    ap.add_argument('--move', type=float, default=0.025, help="현재가 변동폭 (전일 종가 대비 표준편차)")
+    ap.add_argument('--drain', type=float, default=30.0, help="사이클 후 발신 큐 비우기 대기 상한(초)")
+    ap.add_argument('--rps', type=float, default=0, help="피드/시세 요청 초당 한도 (0이면 제한 없음, 운영값은 SCHED_MAX_RPS)")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--verbose', action='store_true', help="app 로그 출력도 표시")
+    ap.add_argument('--no-tracemalloc', action='store_true', help="메모리 추적 끄기 (추적 오버헤드 없이 시간만)")
+    ap.add_argument('--json', help="결과를 JSON으로 저장할 경로")
+    ap.add_argument('--workdir', help="작업 폴더 (기본: 임시 폴더)")
+    ap.add_argument('--serve', action='store_true', help="대역 서버만 띄우고 대기")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=0)
+    args = ap.parse_args()
+    if args.json: args.json = os.path.abspath(args.json)  # load_app이 작업 폴더로 이동하기 전에
+
+    injector = Injector(args.latency, args.jitter, args.error_rate, args.seed)
+    server = StandInServer(injector, args.host, args.port, args.fresh).start()
+    if args.serve:
+        print(f"🧪 대역 서버 {server.base}", flush=True)
+        for k, v in server.env().items(): print(f"export {k}={v}", flush=True)
+        try:
+            while True: time.sleep(3600)
+        except KeyboardInterrupt: pass
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='debrief_bench_')
+    if not args.workdir: atexit.register(shutil.rmtree, workdir, True)  # app의 종료 시 저장(atexit)보다 나중에 실행되도록 먼저 등록
+    app = load_app(workdir, server.env())
+    app.prices.yf.download = YahooFixture(injector, args.move, args.seed).download
+    app.translate.GoogleTranslator = TranslatorFixture(injector)
+    trace = not args.no_tracemalloc
+    if trace: tracemalloc.start()
+
+    report = sys.stdout
+    if not args.verbose: sys.stdout = open(os.devnull, 'w')  # write_log의 콘솔 출력 (로그 파일에는 그대로 남음)
+    results = []
+    print(f"작업 폴더 {workdir} · 대역 {server.base} · 지연 {args.latency}+{args.jitter}s · 오류율 {args.error_rate}", file=report, flush=True)
+    for i, size in enumerate(int(s) for s in args.sizes.split(',')):
+        for j, mode in enumerate(args.modes.split(',')):
+            if mode == 'async' and app.net.aiohttp is None: mode = 'thread'
+            prefix = f"{chr(65 + i)}{chr(65 + j)}"  # 조합마다 다른 종목 -> 첫 사이클은 봉/피드/번역 캐시가 빈 상태
+            for row in run_case(app, server, injector, size, mode, args.cycles, prefix, trace, args.drain, args.rps, args.chats, args.seed):
+                print(format_row(row), file=report, flush=True); results.append(row)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f: json.dump(results, f, ensure_ascii=False, indent=2)
+    server.stop()
+
+if __name__ == '__main__':
+    main()
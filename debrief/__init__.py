@@ -0,0 +1,12 @@
+"""
+DeBrief 감시/봇 엔진
+
+Streamlit 없이 import 되는 패키지. 감시 파이프라인, 텔레그램 봇, 설정/알림 상태 저장소가 모두
+여기 있고, app.py(Streamlit)는 이 패키지의 프로세스 전역 인스턴스를 읽어 보여 주는 얇은 UI다.
+
+    python -m debrief run | worker   # 헤드리스 실행 (cli.py)
+"""
+from .config import get_config_store, load_config, save_config
+from .monitor import Monitor
+from .state import get_alert_state
+from .worker import run_embedded, start_background_worker
@@ -0,0 +1,270 @@
+"""[3] 텔레그램 봇 (명령어 처리 + 롱폴링)"""
+import time
+import telebot
+import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+from telebot.types import BotCommand
+from .config import DEFAULT_OPTS, default_chat, get_config_store, load_config
+from .earnings import earnings_message, get_earnings_index, parse_finviz_earnings
+from .metrics import get_metrics
+from .outbox import get_telegram_outbox
+from .prices import get_quote_cache
+from .runtime import singleton
+from .schedule import effective_quote_max_age
+from .sources import FEED_FRESH_SECONDS, TTLCache, get_economic_events, get_finviz_data, get_integrated_news
+from .subscriptions import chat_watchlist, match_option
+
+COMMAND_WORKERS = 8  # 조회 명령 동시 실행 상한 (느린 스크래핑 하나가 다른 사용자의 명령을 막지 않도록)
+# 조회 명령별 응답 캐시 유지 시간(초) - 같은 (명령, 티커)는 이 시간 동안 모든 채팅방이 공유
+COMMAND_TTL = {'summary': 300, 'earning': 3600, 'eco': 300, 'news': FEED_FRESH_SECONDS, 'sec': FEED_FRESH_SECONDS, 'p': 15}
+COMMAND_LOADING = "⏳ 조회 중..."
+
+@singleton
+def get_command_pool():
+    return ThreadPoolExecutor(max_workers=COMMAND_WORKERS, thread_name_prefix="DeBrief_Cmd")
+
+def create_bot(token):
+    """명령어 핸들러를 등록한 TeleBot (Streamlit 내장 워커와 독립 워커 모드의 리더가 공용)"""
+    bot = telebot.TeleBot(token)
+
+    def command(*names):
+        """message_handler 등록 + 명령별 처리 시간/오류 집계 (오류는 예전처럼 응답 없이 넘어가되 유형별로 셈)"""
+        def register(fn):
+            def handler(m):
+                with get_metrics().guard(f"cmd.{names[0]}"): fn(m)
+            return bot.message_handler(commands=list(names))(handler)
+        return register
+
+    def deliver(m, text, parse_mode, ack=None):
+        """답장(ack가 있으면 그 메시지를 고쳐 씀). 제목 등에 섞인 마크다운 기호로 파싱에 실패하면 일반 텍스트로"""
+        def send(**kw):
+            if ack: return bot.edit_message_text(text, m.chat.id, ack.message_id, disable_web_page_preview=True, **kw)
+            return bot.reply_to(m, text, disable_web_page_preview=True, **kw)
+        try: send(parse_mode=parse_mode)
+        except telebot.apihelper.ApiTelegramException:
+            if not parse_mode: raise
+            send()
+
+    def lookup(*names, usage=None, miss=None):
+        """조회 명령 등록: build(티커) -> (본문, parse_mode), 결과가 없으면 None을 명령 풀에서 실행
+
+        결과는 명령별 TTL 캐시에 두고, 같은 (명령, 티커)를 동시에 요청하면 조회는 한 번만 하고 결과를 나눠 쓴다.
+        결과 없음(None)은 일시적인 조회 실패일 수 있어 캐시하지 않고 miss 문구로 답한다.
+        캐시에 없으면 '조회 중' 답장을 먼저 보내고 결과가 나오면 그 메시지를 고쳐 쓴다.
+        """
+        cache = TTLCache(COMMAND_TTL[names[0]])
+        def register(build):
+            def run(m, arg):
+                key = (names[0], arg)
+                hit = cache.get(key)
+                if hit is not None: return deliver(m, *hit)
+                get_metrics().inc('command_cache_miss', command=names[0])
+                ack = bot.reply_to(m, COMMAND_LOADING)
+                try: result = cache.get_or_load(key, lambda: build(arg))
+                except Exception as e:
+                    get_metrics().error(f"cmd.{names[0]}", e)
+                    result = ("오류 발생", None)
+                deliver(m, *(result or (miss.format(t=arg), None)), ack=ack)
+
+            def handler(m):
+                parts = m.text.split()
+                arg = parts[1].upper() if len(parts) > 1 else None
+                if usage and not arg: return bot.reply_to(m, f"사용법: {usage}")
+                def job():
+                    with get_metrics().guard(f"cmd.{names[0]}"): run(m, arg)
+                get_command_pool().submit(job)  # 롱폴링/핸들러 스레드는 바로 다음 업데이트로
+            return bot.message_handler(commands=list(names))(handler)
+        return register
+
+    @command('start', 'help')
+    def start_cmd(m): 
+        msg = ("🤖 *DeBrief V55*\n"
+               "/on : 시스템 켜기 (복구됨)\n"
+               "/off : 시스템 끄기 (복구됨)\n"
+               "/earning [티커] : 실적발표\n"
+               "/summary [티커] : 재무요약\n"
+               "/eco : 경제지표\n"
+               "/news [티커] : 뉴스\n"
+               "/sec [티커] : 공시\n"
+               "/p [티커] : 현재가\n"
+               "/list : 감시목록\n"
+               "/add [티커] : 추가\n"
+               "/del [티커] : 삭제\n"
+               "/set [티커] [옵션] on|off : 알림 옵션\n"
+               "/subscribe [이름] : 이 채팅방 전용 목록 만들기\n"
+               "/unsubscribe : 전용 목록 해제\n"
+               "/stats : 처리 통계\n"
+               "/ping : 생존확인")
+        bot.reply_to(m, msg, parse_mode='Markdown')
+
+    # [복구] on/off 명령어 (즉시 반영)
+    @command('on')
+    def on_cmd(m):
+        get_config_store().update(lambda c: c.update(system_active=True))
+        bot.reply_to(m, "🟢 시스템 가동 (모니터링 시작)")
+
+    @command('off')
+    def off_cmd(m):
+        get_config_store().update(lambda c: c.update(system_active=False))
+        bot.reply_to(m, "⛔ 시스템 정지 (모니터링 중단)")
+
+    # 조회 명령: 외부 호출이 있어 명령 풀에서 실행하고 응답은 캐시 (build는 (본문, parse_mode) 반환)
+    @lookup('earning', '실적', usage="/earning [티커]", miss="❌ {t}: 정보 없음.")
+    def earning_cmd(t):
+        hit = get_earnings_index().get(t)  # 감시 목록 종목은 대개 일괄 갱신된 색인에 있음
+        if hit: return earnings_message(t, **hit), 'Markdown'
+        data = get_finviz_data(t)
+        if 'Earnings' in data and data['Earnings'] != '-':
+            e_date = data['Earnings']
+            parsed = parse_finviz_earnings(e_date)
+            if parsed:
+                get_earnings_index().put(t, *parsed, 'finviz')
+                return earnings_message(t, *parsed, 'finviz'), 'Markdown'
+            clean_date = e_date.replace(' BMO','').replace(' AMC','')
+            time_icon = "☀️ 장전" if "BMO" in e_date else "🌙 장후" if "AMC" in e_date else ""
+            return f"📅 *{t} 실적 발표*\n🗓️ 일시: `{clean_date}` {time_icon}\nℹ️ 출처: Finviz", 'Markdown'
+        stock = yf.Ticker(t)
+        with get_metrics().guard('yfinance.earnings'):
+            dates = stock.earnings_dates
+            if dates is not None and not dates.empty:
+                if dates.index.tz is not None: dates.index = dates.index.tz_localize(None)
+                target = dates.index[0]
+                return f"📅 *{t} 실적 발표*\n🗓️ 일시: `{target.strftime('%Y-%m-%d')}`\n(Yfinance)", 'Markdown'
+        return None
+
+    @lookup('summary', '요약', usage="/summary [티커]", miss="❌ {t}: 정보 없음.")
+    def summary_cmd(t):
+        d = get_finviz_data(t)
+        q = get_quote_cache().fetch(t, effective_quote_max_age())
+        if not d and not q: return None  # Finviz/시세 모두 실패 -> N/A 요약을 캐시하지 않음
+        curr_p = q['price'] if q else None
+        price = f"{curr_p:.2f}" if curr_p else d.get('Price', 'N/A')
+        pe = d.get('P/E', 'N/A'); pbr = d.get('P/B', 'N/A')
+        cap = d.get('Market Cap', 'N/A'); target = d.get('Target Price', 'N/A')
+        if cap == 'N/A':
+            with get_metrics().guard('yfinance.market_cap'): cap = f"${yf.Ticker(t).fast_info.market_cap/1e9:.2f}B"
+        return (f"📊 *{t} 재무 요약*\n💰 현재가: `${price}`\n🏢 시가총액: `{cap}`\n📈 PER: `{pe}`\n📚 PBR: `{pbr}`\n🎯 목표주가: `${target}`"), 'Markdown'
+
+    @lookup('eco', miss="❌ 일정 없음")
+    def eco_cmd(_):
+        events = get_economic_events()
+        if not events: return None
+        msg = "📅 *주요 경제 일정 (USD)*\n────────────────"
+        c=0
+        for e in events:
+            icon = "🔥" if e['impact'] == 'High' else "🔸"
+            fcst = f"(예상:{e['forecast']})" if e['forecast'] else ""
+            msg += f"\n{icon} `{e['date']} {e['time']}`\n*{e['event']}* {fcst}\n"
+            c+=1
+            if c>=15: break
+        return msg, 'Markdown'
+
+    @lookup('news', usage="/news [티커]", miss="뉴스 없음")
+    def news_cmd(t):
+        items = get_integrated_news(t, False, max_age=FEED_FRESH_SECONDS)
+        if not items: return None
+        msg = [f"📰 *{t} News*"]
+        for i in items: msg.append(f"▪️ `[{i['date']}]` [{i['title'].replace('[','').replace(']','')}]({i['link']})")
+        return "\n\n".join(msg), 'Markdown'
+
+    @lookup('sec', usage="/sec [티커]", miss="❌ {t} 공시 없음")
+    def sec_cmd(t):
+        items = get_integrated_news(t, True, max_age=FEED_FRESH_SECONDS)
+        if not items: return None
+        msg = [f"🏛️ *{t} SEC*"]
+        for i in items: msg.append(f"▪️ `[{i['date']}]` [{i['title'].replace('🏛️ ','').replace('[','').replace(']','')}]({i['link']})")
+        return "\n\n".join(msg), 'Markdown'
+
+    @lookup('p', usage="/p [티커]", miss="❌ {t}: 시세 없음")
+    def p_cmd(t):
+        q = get_quote_cache().fetch(t, effective_quote_max_age())
+        if not q: return None
+        return f"💰 *{t}*: `${q['price']:.2f}`", 'Markdown'
+
+    # 목록/옵션 명령은 명령이 들어온 채팅방의 목록에 적용 (구독 등록 전에는 주 목록)
+    @command('list')
+    def list_cmd(m):
+        bot.reply_to(m, f"📋 목록: {', '.join(chat_watchlist(load_config(), m.chat.id).keys())}")
+
+    @command('add')
+    def add_cmd(m):
+        t = m.text.split()[1].upper()
+        if get_config_store().update(lambda c: chat_watchlist(c, m.chat.id).setdefault(t, DEFAULT_OPTS.copy())): bot.reply_to(m, f"✅ {t} 추가됨")
+
+    @command('del')
+    def del_cmd(m):
+        t = m.text.split()[1].upper()
+        if get_config_store().update(lambda c: chat_watchlist(c, m.chat.id).pop(t, None)): bot.reply_to(m, f"🗑️ {t} 삭제됨")
+
+    @command('set')
+    def set_cmd(m):
+        parts = m.text.split()
+        chat = str(m.chat.id)
+        if len(parts) == 3 and parts[1].lower() == 'eco':
+            on = parts[2].lower() == 'on'
+            def set_eco(c):
+                if chat in c['chats']: c['chats'][chat]['eco_mode'] = on
+                else: c['eco_mode'] = on
+            get_config_store().update(set_eco)
+            return bot.reply_to(m, f"📢 경제지표 알림 {'켬' if on else '끔'}")
+        if len(parts) < 4: return bot.reply_to(m, "사용법: /set [티커] [옵션] on|off (예: /set TSLA RSI on, /set eco off)")
+        t = parts[1].upper(); opt = match_option(parts[2]); on = parts[3].lower() == 'on'
+        if not opt: return bot.reply_to(m, "옵션: " + ", ".join(DEFAULT_OPTS))
+        found = []
+        def set_opt(c):
+            tickers = chat_watchlist(c, chat)
+            if t in tickers: tickers[t][opt] = on; found.append(t)
+        get_config_store().update(set_opt)
+        bot.reply_to(m, f"{'🟢' if on else '⚪'} {t} {opt} {'켬' if on else '끔'}" if found else f"❌ {t}: 목록에 없음")
+
+    @command('subscribe')
+    def subscribe_cmd(m):
+        chat = str(m.chat.id)
+        if chat == str(get_config_store().get('telegram', 'chat_id', default='')):
+            return bot.reply_to(m, "ℹ️ 주 채팅방은 기본 목록을 사용합니다.")
+        name = " ".join(m.text.split()[1:]) or getattr(m.chat, 'title', None) or getattr(m.chat, 'username', None) or chat
+        if get_config_store().update(lambda c: c['chats'].setdefault(chat, default_chat(name))):
+            bot.reply_to(m, f"✅ 구독 등록 ({name}). /add 로 이 채팅방 전용 종목을 추가하세요.")
+        else: bot.reply_to(m, "ℹ️ 이미 등록된 채팅방입니다.")
+
+    @command('unsubscribe')
+    def unsubscribe_cmd(m):
+        if get_config_store().update(lambda c: c['chats'].pop(str(m.chat.id), None)): bot.reply_to(m, "🗑️ 구독 해제")
+        else: bot.reply_to(m, "ℹ️ 등록된 구독이 없습니다.")
+
+    @command('ping')
+    def ping_cmd(m): bot.reply_to(m, "🏓 Pong! 정상.")
+
+    @command('stats')
+    def stats_cmd(m):
+        metrics = get_metrics()
+        up = int(time.time() - metrics.started_at)
+        rows = [f"{r['stage'][:22]:<22} {r['calls']:>6} {r['errors']:>4} {r['p50']:>5.2f} {r['p95']:>5.2f}" for r in metrics.summary()[:20]]
+        errs = [f"{stage} {kind}: {n}" for stage, kind, n in metrics.error_summary()[:8]]
+        ob = get_telegram_outbox().stats()
+        msg = (f"📈 *처리 통계* (가동 {up // 3600}h {up % 3600 // 60}m)\n"
+               f"```\n{'stage':<22} {'calls':>6} {'err':>4} {'p50':>5} {'p95':>5}\n" + "\n".join(rows) + "\n```\n"
+               f"📤 발신 {ob['sent']} · 재시도 {ob['retried']} · 실패 {ob['failed']} · 대기 {ob['depth']}")
+        if errs: msg += "\n⚠️ 오류 유형\n```\n" + "\n".join(errs) + "\n```"
+        bot.reply_to(m, msg, parse_mode='Markdown')
+
+    with get_metrics().guard('telegram.commands'):
+        bot.set_my_commands([
+            BotCommand("eco", "📅 경제지표"), BotCommand("earning", "💰 실적 발표"),
+            BotCommand("news", "📰 뉴스"), BotCommand("summary", "📊 요약"),
+            BotCommand("p", "💰 현재가"), BotCommand("sec", "🏛️ 공시"),
+            BotCommand("ping", "🏓 생존확인"), BotCommand("list", "📋 목록"),
+            BotCommand("on", "🟢 가동"), BotCommand("off", "⛔ 정지"),
+            BotCommand("add", "➕ 추가"), BotCommand("del", "🗑️ 삭제"),
+            BotCommand("set", "🔧 알림 옵션"), BotCommand("subscribe", "👥 채팅방 구독"),
+            BotCommand("unsubscribe", "👋 구독 해제"), BotCommand("stats", "📈 통계")
+        ])
+    return bot
+
+def poll_bot(bot, stop=None):
+    """stop(Event)이 설정될 때까지 롱폴링 (오류 시 5초 후 재시도)"""
+    while not (stop and stop.is_set()):
+        try: bot.infinity_polling(timeout=10, long_polling_timeout=5, skip_pending=True)
+        except Exception as e:
+            get_metrics().error('telegram.polling', e)
+            time.sleep(5)
@@ -0,0 +1,32 @@
+"""
+헤드리스 실행 (Streamlit 없이 감시/봇만)
+
+    python -m debrief run                           # 단독: 봇 롱폴링 + 전 종목 감시
+    python -m debrief worker [--id ID] [--db PATH]  # 분담 워커: 같은 DB를 보는 워커끼리 종목을 나누고 리더가 봇을 맡음
+
+UI는 DEBRIEF_WORKER_MODE=off streamlit run app.py 로 따로 띄운다 (설정은 JSONBin/설정 파일로 공유).
+"""
+import argparse
+from .cluster import CLUSTER_DB_FILE, Cluster, run_worker
+from .logs import use_log_file, worker_log_file
+from .metrics import METRICS_PORT, get_metrics, start_metrics_server
+from .worker import run_embedded
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m debrief", description="DeBrief 감시/봇 (Streamlit 없이)")
+    sub = ap.add_subparsers(dest='command', required=True)
+    sub.add_parser('run', help="단독 실행 (봇 롱폴링 + 전 종목 감시)")
+    worker = sub.add_parser('worker', help="분담 워커 (해시 링으로 종목 분담, 리더가 봇/경제 일정 담당)")
+    worker.add_argument('--id', help="워커 id (기본: 호스트:pid) - 로그는 debrief.<id>.log 에 따로 기록")
+    worker.add_argument('--db', default=CLUSTER_DB_FILE, help="클러스터 SQLite 파일 - 같은 파일을 보는 워커끼리 종목을 나눔")
+    args = ap.parse_args(argv)
+    try:
+        if args.command == 'run': run_embedded()
+        else:
+            cluster = Cluster(args.db, args.id)
+            use_log_file(worker_log_file(cluster.worker_id))  # 시작 단계 기록부터 워커 로그로
+            if METRICS_PORT:
+                with get_metrics().guard('metrics.server'): start_metrics_server(int(METRICS_PORT))
+            run_worker(cluster)
+    except KeyboardInterrupt: pass
+    return 0
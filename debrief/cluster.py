@@ -0,0 +1,126 @@
+"""[3-1] 워커 분담 (해시 링으로 종목 분할 + SQLite 임대로 리더 선출)"""
+import bisect
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from .bot import create_bot, poll_bot
+from .config import get_config_store
+from .logs import use_log_file, worker_log_file, write_log
+from .metrics import get_metrics
+from .monitor import Monitor
+from .runtime import CONFIG_REFRESH_INTERVAL
+from .state import get_alert_state
+from .status import start_status_publisher
+
+CLUSTER_DB_FILE = os.environ.get("DEBRIEF_CLUSTER_DB", 'debrief_cluster.db')
+CLUSTER_HEARTBEAT = 5          # 명단/리더 임대 갱신 간격(초)
+CLUSTER_TTL = 20               # 이 시간 동안 하트비트가 없으면 명단에서 빠지고 임대도 만료
+CLUSTER_VNODES = 64            # 해시 링에서 워커당 가상 노드 수
+CLUSTER_CLAIM_TTL = 7 * 86400  # 1회성 알림 선점 기록 보관 기간(초)
+
+class HashRing:
+    """워커마다 가상 노드를 링에 뿌려 두고 종목을 시계 방향 첫 노드의 워커에 배정 (워커 증감 시 일부 종목만 이동)"""
+    def __init__(self, nodes, vnodes=CLUSTER_VNODES):
+        self.points = sorted((self._hash(f"{n}#{i}"), n) for n in nodes for i in range(vnodes))
+        self.keys = [h for h, _ in self.points]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+    def owner(self, key):
+        if not self.points: return None
+        return self.points[bisect.bisect(self.keys, self._hash(key)) % len(self.points)][1]
+
+class Cluster:
+    """같은 SQLite 파일을 보는 워커들의 명단(하트비트), 리더 임대, 1회성 알림 선점
+
+    외부 서비스 없이 한 대(또는 공유 디스크)에서 동작한다. 임대는 조건부 UPSERT 한 문장으로
+    갱신하므로 여러 프로세스가 동시에 시도해도 한 워커만 리더가 된다.
+    """
+    def __init__(self, path=CLUSTER_DB_FILE, worker_id=None, ttl=CLUSTER_TTL):
+        self.ttl = ttl
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS workers (id TEXT PRIMARY KEY, seen REAL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, owner TEXT, at REAL)")
+        self.db.commit()
+        self.members = [self.worker_id]
+        self.ring = HashRing(self.members)
+        self.leader = False
+
+    def beat(self):
+        """하트비트 + 리더 임대 획득/연장 + 명단 갱신 -> 명단이 바뀌었으면 True"""
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO workers (id, seen) VALUES (?, ?)", (self.worker_id, now))
+            self.db.execute("DELETE FROM workers WHERE seen < ?", (now - self.ttl,))
+            self.db.execute("INSERT INTO leases (name, owner, expires) VALUES ('leader', ?, ?) "
+                            "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                            "WHERE leases.owner = excluded.owner OR leases.expires < ?", (self.worker_id, now + self.ttl, now))
+            owner = self.db.execute("SELECT owner FROM leases WHERE name = 'leader'").fetchone()[0]
+            members = sorted(r[0] for r in self.db.execute("SELECT id FROM workers"))
+            self.db.commit()
+        self.leader = owner == self.worker_id
+        if members == self.members: return False
+        self.members, self.ring = members, HashRing(members)
+        return True
+
+    def owns(self, ticker):
+        return self.ring.owner(ticker) == self.worker_id
+
+    def claim(self, key):
+        """key를 처음 선점한 워커만 True (다이제스트/발표 알림을 리더가 바뀌어도 한 번만)"""
+        now = time.time()
+        with self.lock:
+            cur = self.db.execute("INSERT OR IGNORE INTO claims (key, owner, at) VALUES (?, ?, ?)", (key, self.worker_id, now))
+            self.db.execute("DELETE FROM claims WHERE at < ?", (now - CLUSTER_CLAIM_TTL,))
+            self.db.commit()
+        return cur.rowcount == 1
+
+    def leave(self):
+        with self.lock:
+            self.db.execute("DELETE FROM workers WHERE id = ?", (self.worker_id,))
+            self.db.execute("DELETE FROM leases WHERE owner = ?", (self.worker_id,))
+            self.db.commit()
+
+def run_worker(cluster=None):
+    """분담 워커: 해시 링에서 자기 몫인 종목만 감시하고, 리더가 된 워커만 텔레그램 폴링과 경제 일정 알림을 맡음"""
+    cluster = cluster or Cluster()
+    use_log_file(worker_log_file(cluster.worker_id))
+    cluster.beat()
+    monitor = Monitor(shard=cluster)
+    threading.Thread(target=monitor.run, daemon=True, name="DeBrief_Monitor").start()
+    start_status_publisher(cluster.worker_id)
+    write_log(f"🧩 워커 시작 {cluster.worker_id} (워커 {len(cluster.members)}개)")
+    bot = stop = None; refreshed = time.time()
+    try:
+        while True:
+            try:
+                if cluster.beat():
+                    write_log(f"🧩 워커 {len(cluster.members)}개로 종목 재분배")
+                    get_alert_state().reload()  # 넘겨받은 종목의 알림 상태 (이전 담당 워커가 기록한 것)
+                if time.time() - refreshed >= CONFIG_REFRESH_INTERVAL:
+                    get_config_store().refresh(); refreshed = time.time()
+                token = get_config_store().get('telegram', 'bot_token')
+                if cluster.leader and bot is None and token:
+                    write_log(f"👑 리더 {cluster.worker_id} - 텔레그램 폴링 시작")
+                    bot, stop = create_bot(token), threading.Event()
+                    threading.Thread(target=poll_bot, args=(bot, stop), daemon=True, name="DeBrief_Poller").start()
+                elif not cluster.leader and bot is not None:
+                    write_log(f"⚠️ 리더 임대 상실 {cluster.worker_id} - 텔레그램 폴링 중지")
+                    stop.set(); bot.stop_polling()
+                    bot = stop = None
+                get_metrics().set('cluster_members', len(cluster.members))
+                get_metrics().set('cluster_leader', int(cluster.leader))
+            except Exception as e:
+                get_metrics().error('cluster', e)
+                write_log(f"Cluster Err: {e}")
+            time.sleep(CLUSTER_HEARTBEAT)
+    finally: cluster.leave()
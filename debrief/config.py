@@ -0,0 +1,322 @@
+"""[1] 설정 로드/저장 (자동 마이그레이션 포함)"""
+import atexit
+import copy
+import json
+import os
+import threading
+import time
+from .logs import write_log
+from .metrics import get_metrics
+from .net import get_http_session
+from .runtime import CONFIG_FILE, CONFIG_FLUSH_INTERVAL, CONFIG_REFRESH_INTERVAL, QUOTE_MAX_AGE, get_secrets, singleton
+
+JSONBIN_API = os.environ.get("DEBRIEF_JSONBIN_API", "https://api.jsonbin.io/v3")  # 외부 엔드포인트는 환경변수로 대체 가능 (bench.py 대역 서버)
+
+def get_jsonbin_headers():
+    try:
+        if "jsonbin" in get_secrets():
+            return {'Content-Type': 'application/json', 'X-Master-Key': get_secrets()["jsonbin"]["master_key"]}
+    except: pass
+    return None
+
+def get_jsonbin_url():
+    try:
+        if "jsonbin" in get_secrets():
+            bin_id = get_secrets()["jsonbin"]["bin_id"]
+            return f"{JSONBIN_API}/b/{bin_id}"
+    except: pass
+    return None
+
+# [핵심] 아이콘이 포함된 기본 옵션 (복구됨)
+DEFAULT_OPTS = {
+    "🟢 감시": True, 
+    "📰 뉴스": True, 
+    "🏛️ SEC": True, 
+    "📈 급등락(3%)": True,
+    "📊 거래량(2배)": False, 
+    "🚀 신고가": True, 
+    "📉 RSI": False,
+    "〰️ MA크로스": False, 
+    "🛁 볼린저": False, 
+    "🌊 MACD": False
+}
+
+def migrate_options(old_opts):
+    """구버전 키(아이콘 없음)를 신버전(아이콘 있음)으로 자동 변환"""
+    new_opts = DEFAULT_OPTS.copy()
+    # 매핑 테이블 (구 -> 신)
+    mapping = {
+        "감시_ON": "🟢 감시", "뉴스": "📰 뉴스", "SEC": "🏛️ SEC",
+        "가격_3%": "📈 급등락(3%)", "거래량_2배": "📊 거래량(2배)",
+        "52주_신고가": "🚀 신고가", "RSI": "📉 RSI", "MA_크로스": "〰️ MA크로스",
+        "볼린저": "🛁 볼린저", "MACD": "🌊 MACD"
+    }
+    
+    for old_k, val in old_opts.items():
+        if old_k in mapping:
+            new_opts[mapping[old_k]] = val # 구버전 값 승계
+        elif old_k in new_opts:
+            new_opts[old_k] = val # 이미 신버전 키라면 그대로
+            
+    return new_opts
+
+def default_config():
+    return {
+        "system_active": True,
+        "eco_mode": True,
+        "telegram": {"bot_token": "", "chat_id": ""}, 
+        "tickers": {
+            "TSLA": DEFAULT_OPTS.copy(),
+            "NVDA": DEFAULT_OPTS.copy()
+        },
+        "quote_max_age": QUOTE_MAX_AGE,
+        "quote_stream": False,
+        "chats": {}  # 추가 구독 채팅방: chat_id -> default_chat() (주 채팅방은 telegram.chat_id + tickers)
+    }
+
+def default_chat(name=""):
+    return {"name": name, "eco_mode": True, "tickers": {}}
+
+def normalize_chat(sub):
+    chat = default_chat(sub.get('name', ''))
+    chat['eco_mode'] = sub.get('eco_mode', True)
+    chat['tickers'] = {t: migrate_options(opts) for t, opts in sub.get('tickers', {}).items()}
+    return chat
+
+def normalize_config(loaded_data):
+    """저장된 레코드를 기본 구조에 병합하고 구버전 옵션 키를 마이그레이션"""
+    config = default_config()
+    if loaded_data:
+        if "telegram" in loaded_data: config['telegram'] = loaded_data['telegram']
+        if "system_active" in loaded_data: config['system_active'] = loaded_data['system_active']
+        if "eco_mode" in loaded_data: config['eco_mode'] = loaded_data['eco_mode']
+        if loaded_data.get("news_history"): config['news_history'] = loaded_data['news_history']  # 구버전 -> SeenStore로 이관
+        if "quote_max_age" in loaded_data: config['quote_max_age'] = loaded_data['quote_max_age']
+        if "quote_stream" in loaded_data: config['quote_stream'] = loaded_data['quote_stream']
+        
+        if "tickers" in loaded_data:
+            # 저장본이 있으면 기본 종목을 덧붙이지 않음 (삭제한 종목이 재로드 시 되살아나지 않도록)
+            config['tickers'] = {t: migrate_options(opts) for t, opts in loaded_data['tickers'].items()}
+        if "chats" in loaded_data:
+            config['chats'] = {str(c): normalize_chat(sub) for c, sub in loaded_data['chats'].items()}
+
+    # Secrets (최우선)
+    try:
+        if "telegram" in get_secrets():
+            config['telegram']['bot_token'] = get_secrets()["telegram"]["bot_token"]
+            config['telegram']['chat_id'] = get_secrets()["telegram"]["chat_id"]
+    except: pass
+    return config
+
+def fetch_remote_config():
+    """JSONBin 최신 레코드 (없거나 실패 시 None)"""
+    url = get_jsonbin_url()
+    headers = get_jsonbin_headers()
+    if url and headers:
+        with get_metrics().guard('jsonbin.load'):
+            resp = get_http_session().get(f"{url}/latest", headers=headers, timeout=5)
+            if resp.status_code == 200:
+                return resp.json()['record']
+            get_metrics().error('jsonbin.load', f"HTTP {resp.status_code}")
+    return None
+
+def fetch_local_config():
+    if os.path.exists(CONFIG_FILE):
+        with get_metrics().guard('config.local_load'):
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    return None
+
+_DELETED = object()
+
+def diff_config(old, new, path=()):
+    """두 설정 사이의 변경분을 (경로, 값) 패치 목록으로 반환 (dict는 키 단위로 재귀)"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for k in old.keys() | new.keys():
+            if k not in new: ops.append((path + (k,), _DELETED))
+            elif k not in old: ops.append((path + (k,), copy.deepcopy(new[k])))
+            else: ops.extend(diff_config(old[k], new[k], path + (k,)))
+        return ops
+    return [] if old == new else [(path, copy.deepcopy(new))]
+
+def apply_patch(config, ops):
+    for path, value in ops:
+        node = config
+        for k in path[:-1]: node = node.setdefault(k, {})
+        if value is _DELETED: node.pop(path[-1], None)
+        else: node[path[-1]] = copy.deepcopy(value)
+    return config
+
+def delete_op(path):
+    """ConfigStore.patch에 넘길 삭제 연산"""
+    return (tuple(path), _DELETED)
+
+class ConfigStore:
+    """프로세스 전역 설정 저장소
+
+    시작 시 한 번만 읽어 메모리에 보관하고, 변경분(패치)만 모아 백그라운드에서 저장한다.
+    JSONBin 레코드의 `_version`으로 낙관적 동시성 검사를 하며, 다른 쪽이 먼저 저장했으면
+    원격본 위에 대기 중인 패치를 다시 적용한 뒤 저장한다.
+
+    쓰기는 patch/update(바꾼 경로만)로만 받는다 - 화면이 들고 있던 설정 사본 전체를 되쓰면 그 사이
+    봇(/add 등)이 바꾼 항목이 되돌아가기 때문. 한 프로세스 안의 저장은 flush_lock으로 한 번에 하나씩이지만,
+    JSONBin에는 조건부 PUT이 없어 서로 다른 프로세스 둘이 같은 vN을 읽고 거의 동시에 저장하면
+    (GET과 PUT 사이 수백 ms) 나중 PUT이 앞선 것을 덮는다. 그 경우 덮인 쪽 변경은 다음 refresh에서 사라진다.
+    """
+    def __init__(self, flush_interval=CONFIG_FLUSH_INTERVAL):
+        self.lock = threading.RLock()
+        self.flush_interval = flush_interval
+        self.pending = []           # 아직 저장되지 않은 패치
+        self.remote_version = 0     # 마지막으로 확인한 원격 레코드 버전
+        self.flush_event = threading.Event()
+        self.flush_lock = threading.Lock()   # 저장 루프와 종료 시 저장(atexit)이 겹치지 않게
+        self.flusher = None
+
+        loaded = fetch_remote_config() or fetch_local_config()
+        self.remote_version = (loaded or {}).get('_version', 0)
+        self.data = normalize_config(loaded)
+
+    # --- 읽기 ---
+    def snapshot(self):
+        with self.lock: return copy.deepcopy(self.data)
+
+    def get(self, *path, default=None):
+        with self.lock:
+            node = self.data
+            for k in path:
+                if not isinstance(node, dict) or k not in node: return default
+                node = node[k]
+            return copy.deepcopy(node)
+
+    # --- 쓰기 ---
+    def patch(self, ops):
+        if not ops: return False
+        with self.lock:
+            apply_patch(self.data, ops)
+            self.pending.extend(ops)
+        self._schedule_flush()
+        return True
+
+    def update(self, fn):
+        """fn(config)로 메모리 설정을 원자적으로 수정 (read-modify-write 경합 방지)"""
+        with self.lock:
+            before = copy.deepcopy(self.data)
+            fn(self.data)
+            ops = diff_config(before, self.data)
+            self.pending.extend(ops)
+        if ops: self._schedule_flush()
+        return bool(ops)
+
+    def refresh(self):
+        """다른 프로세스가 저장한 최신본이 있으면 반영 (저장 대기 중인 변경이 있으면 flush의 재적용에 맡김)"""
+        latest = fetch_remote_config() if get_jsonbin_url() and get_jsonbin_headers() else fetch_local_config()
+        version = (latest or {}).get('_version', 0)
+        with self.lock:
+            if latest is None or version <= self.remote_version or self.pending: return False
+            self.data = normalize_config(latest)
+            self.remote_version = version
+        return True
+
+    @property
+    def dirty(self):
+        with self.lock: return bool(self.pending)
+
+    # --- 백그라운드 저장 ---
+    def _schedule_flush(self):
+        with self.lock:
+            if self.flusher is None or not self.flusher.is_alive():
+                self.flusher = threading.Thread(target=self._flush_loop, daemon=True, name="DeBrief_ConfigFlush")
+                self.flusher.start()
+        self.flush_event.set()
+
+    def _flush_loop(self):
+        while True:
+            self.flush_event.wait()
+            time.sleep(self.flush_interval)  # 짧은 시간 내 변경은 한 번에 저장
+            self.flush_event.clear()
+            try: self.flush()
+            except Exception as e: write_log(f"Config Flush Err: {e}")
+
+    def _rebase(self, latest):
+        # 다른 인스턴스가 먼저 저장함 -> 최신본 기준으로 대기 패치 재적용 -> (기준 버전, 반영할 패치 수)
+        version = latest.get('_version', 0)
+        with self.lock:
+            self.data = apply_patch(normalize_config(latest), self.pending)
+            self.remote_version = version
+            n_ops = len(self.pending)
+        write_log(f"⚙️ 설정 충돌 감지 (v{version}) - 최신본에 변경분 재적용")
+        return version, n_ops
+
+    def flush(self):
+        with self.flush_lock: self._flush()
+
+    def _flush(self):
+        with self.lock:
+            if not self.pending: return
+            n_ops = len(self.pending)
+            base_version = self.remote_version
+
+        url = get_jsonbin_url()
+        headers = get_jsonbin_headers()
+        if url and headers:
+            remote = fetch_remote_config()
+            remote_version = (remote or {}).get('_version', 0)
+            if remote is not None and remote_version > base_version:
+                base_version, n_ops = self._rebase(remote)
+            with self.lock:
+                record = copy.deepcopy(self.data)
+            record['_version'] = base_version + 1
+            try:
+                with get_metrics().timer('jsonbin.save'):
+                    resp = get_http_session().put(url, headers=headers, json=record, timeout=5)
+                if resp.status_code != 200:
+                    get_metrics().error('jsonbin.save', f"HTTP {resp.status_code}")
+                    write_log(f"Config Save Err: HTTP {resp.status_code}")
+                    self.flush_event.set()
+                    return
+            except Exception as e:
+                write_log(f"Config Save Err: {e}")
+                self.flush_event.set()
+                return
+        else:
+            local = fetch_local_config()  # 같은 폴더의 다른 워커 프로세스가 먼저 저장했을 수 있음
+            if local is not None and local.get('_version', 0) > base_version:
+                base_version, n_ops = self._rebase(local)
+            with self.lock:
+                record = copy.deepcopy(self.data)
+            record['_version'] = base_version + 1
+
+        with get_metrics().guard('config.local_save'):
+            tmp = f"{CONFIG_FILE}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, CONFIG_FILE)
+
+        with self.lock:
+            del self.pending[:n_ops]
+            self.remote_version = record['_version']
+            if self.pending: self.flush_event.set()
+
+@singleton
+def get_config_store():
+    store = ConfigStore()
+    atexit.register(store.flush)
+    return store
+
+@singleton
+def start_config_refresher():
+    """다른 프로세스(따로 띄운 UI 등)가 저장한 설정을 CONFIG_REFRESH_INTERVAL마다 반영하는 스레드를 한 번만 띄움"""
+    def loop():
+        while True:
+            time.sleep(CONFIG_REFRESH_INTERVAL)
+            with get_metrics().guard('config.refresh'): get_config_store().refresh()
+    threading.Thread(target=loop, daemon=True, name="DeBrief_ConfigRefresh").start()
+
+def load_config():
+    """메모리 설정의 사본 (네트워크 호출 없음)"""
+    return get_config_store().snapshot()
+
+def save_config(config, base):
+    """load_config로 받은 사본(base) 대비 바뀐 항목만 저장 대기열에 올림 (그 사이 다른 곳에서 바꾼 항목은 건드리지 않음)"""
+    return get_config_store().patch(diff_config(base, config))
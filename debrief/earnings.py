@@ -0,0 +1,143 @@
+"""[2-8] 실적 발표 일정 색인 (하루 한 번 일괄 갱신 -> 디스크 색인 -> /earning 즉답 + 발표 전일 알림)"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from .logs import write_log
+from .metrics import get_metrics
+from .net import get_http_session
+from .runtime import singleton
+from .schedule import MARKET_TZ, us_market_holidays
+
+EARNINGS_DB_FILE = 'debrief_earnings.db'
+EARNINGS_CALENDAR_URL = os.environ.get("DEBRIEF_EARNINGS_URL", "https://api.nasdaq.com/api/calendar/earnings")
+EARNINGS_HORIZON_DAYS = 30      # 일괄 갱신 때 받을 앞으로의 기간(일) - 발표일 하루당 요청 1건 (휴장일 제외)
+EARNINGS_RETRY_DELAY = 1800     # 갱신 실패 후 재시도까지 대기(초)
+EARNINGS_ALERT_HOUR = 16        # 뉴욕 시각 이 시각(장 마감) 이후 다음 거래일 발표 종목을 알림
+EARNINGS_SESSIONS = {'time-pre-market': 'BMO', 'time-after-hours': 'AMC'}
+SESSION_LABELS = {'BMO': "☀️ 장전", 'AMC': "🌙 장후"}
+SOURCE_LABELS = {'calendar': "Nasdaq", 'finviz': "Finviz"}
+
+def market_today():
+    return datetime.now(MARKET_TZ).date()
+
+def is_market_day(day):
+    return day.weekday() < 5 and day not in us_market_holidays(day.year)
+
+def next_market_day(day):
+    day += timedelta(days=1)
+    while not is_market_day(day): day += timedelta(days=1)
+    return day
+
+def parse_finviz_earnings(text, today=None):
+    """Finviz 'Earnings' 칸 ('Oct 28 AMC') -> ('YYYY-MM-DD', 'BMO'|'AMC'|''), 해석 못 하면 None
+    연도가 없으므로 오늘 기준 반년 전 ~ 반년 후 사이로 맞춤"""
+    parts = (text or '').split()
+    session = parts.pop() if parts and parts[-1] in SESSION_LABELS else ''
+    try: md = datetime.strptime(" ".join(parts[:2]), "%b %d")
+    except ValueError: return None
+    today = today or market_today()
+    day = md.replace(year=today.year).date()
+    if day < today - timedelta(days=180): day = day.replace(year=today.year + 1)
+    elif day > today + timedelta(days=180): day = day.replace(year=today.year - 1)
+    return day.isoformat(), session
+
+def earnings_message(ticker, day, session, source):
+    return (f"📅 *{ticker} 실적 발표*\n🗓️ 일시: `{day}` {SESSION_LABELS.get(session, '')}\n"
+            f"ℹ️ 출처: {SOURCE_LABELS.get(source, source)}")
+
+def earnings_alert(ticker, day, session, today=None):
+    when = "내일" if day - (today or market_today()) == timedelta(days=1) else "다음 거래일"
+    return (f"📅 *[{ticker}]* {when} 실적 발표\n"
+            f"🗓️ `{day:%Y-%m-%d} ({'월화수목금토일'[day.weekday()]})` {SESSION_LABELS.get(session, '시간 미정')}")
+
+class EarningsIndex:
+    """종목 -> 다음 실적 발표일 색인 (SQLite, 발표일 순 보조 색인)
+
+    하루 한 번 발표일별 전 종목 일정(나스닥 실적 캘린더)을 EARNINGS_HORIZON_DAYS일치 받아 한 트랜잭션으로 교체한다.
+    /earning은 종목 키로 바로 답하고, 감시 쪽은 발표일 색인으로 다음 거래일 발표 종목만 꺼낸다.
+    """
+    def __init__(self, path=EARNINGS_DB_FILE):
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.retry_at = 0
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS earnings (ticker TEXT PRIMARY KEY, day TEXT, session TEXT, source TEXT, "
+                        "updated_at REAL) WITHOUT ROWID")
+        self.db.execute("CREATE INDEX IF NOT EXISTS earnings_day ON earnings (day, ticker)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS earnings_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    # --- 조회 ---
+    def get(self, ticker):
+        """오늘 이후 가장 가까운 발표 일정 {'day', 'session', 'source'} 또는 None"""
+        with self.lock:
+            row = self.db.execute("SELECT day, session, source FROM earnings WHERE ticker = ? AND day >= ?",
+                                  (ticker, market_today().isoformat())).fetchone()
+        return dict(zip(('day', 'session', 'source'), row)) if row else None
+
+    def on(self, day):
+        """그 날 발표하는 {종목: session}"""
+        with self.lock: return dict(self.db.execute("SELECT ticker, session FROM earnings WHERE day = ?", (day,)).fetchall())
+
+    def put(self, ticker, day, session, source):
+        """개별 조회(/earning 폴백)로 알아낸 일정 추가 - 다음 일괄 갱신에서 캘린더에 있으면 그쪽으로 덮어씀"""
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO earnings VALUES (?, ?, ?, ?, ?)", (ticker, day, session, source, time.time()))
+            self.db.commit()
+
+    def refreshed_on(self):
+        with self.lock: row = self.db.execute("SELECT value FROM earnings_meta WHERE key = 'refreshed'").fetchone()
+        return row[0] if row else None
+
+    # --- 일괄 갱신 ---
+    def fetch_day(self, day):
+        with get_metrics().timer('earnings.calendar'):
+            resp = get_http_session().get(EARNINGS_CALENDAR_URL, params={'date': day.isoformat()}, timeout=10,
+                                          headers={'Accept': 'application/json'})
+        resp.raise_for_status()
+        rows = (resp.json().get('data') or {}).get('rows') or []
+        return {r['symbol'].upper(): EARNINGS_SESSIONS.get(r.get('time'), '') for r in rows if r.get('symbol')}
+
+    def refresh(self, limiter=None):
+        """오늘(뉴욕 기준) 아직 안 했으면 앞으로의 일정을 받아 교체. 재시작해도 같은 날엔 다시 받지 않음"""
+        today = market_today().isoformat()
+        if self.refreshed_on() == today or time.time() < self.retry_at: return False
+        with self.refresh_lock:
+            if self.refreshed_on() == today: return False
+            start = market_today()
+            days = [d for d in (start + timedelta(days=i) for i in range(EARNINGS_HORIZON_DAYS)) if is_market_day(d)]
+            found = {}
+            try:
+                for day in days:
+                    if limiter: limiter.acquire()
+                    for t, session in self.fetch_day(day).items(): found.setdefault(t, (day.isoformat(), session))
+            except Exception as e:
+                get_metrics().error('earnings.calendar', e)
+                write_log(f"Earnings Refresh Err: {e}")
+                self.retry_at = time.time() + EARNINGS_RETRY_DELAY  # 실패 시 매 사이클 재시도하지 않음
+                return False
+            now = time.time()
+            with self.lock:
+                # 지난 일정, 그리고 이번 범위 안의 캘린더 일정(발표일이 옮겨졌을 수 있음)은 지우고 새로 받은 것으로
+                self.db.execute("DELETE FROM earnings WHERE day < ? OR (source = 'calendar' AND day <= ?)", (today, days[-1].isoformat()))
+                self.db.executemany("INSERT OR REPLACE INTO earnings VALUES (?, ?, ?, 'calendar', ?)",
+                                    [(t, day, session, now) for t, (day, session) in found.items()])
+                self.db.execute("INSERT OR REPLACE INTO earnings_meta VALUES ('refreshed', ?)", (today,))
+                self.db.commit()
+        get_metrics().set('earnings_indexed', len(found))
+        write_log(f"📅 실적 일정 색인 갱신: {len(days)}일 · {len(found)}종목")
+        return True
+
+    def refresh_in_background(self, limiter=None):
+        """refresh를 별도 스레드에서 (감시 묶음이 캘린더 요청 수십 건을 기다리지 않게). 오늘 했거나 이미 도는 중이면 그대로 반환"""
+        if self.refreshed_on() == market_today().isoformat() or time.time() < self.retry_at or self.refresh_lock.locked(): return
+        def run():
+            with get_metrics().guard('earnings.refresh'): self.refresh(limiter)
+        threading.Thread(target=run, daemon=True, name="DeBrief_Earnings").start()
+
+@singleton
+def get_earnings_index():
+    return EarningsIndex()
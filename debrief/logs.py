@@ -0,0 +1,146 @@
+"""[0] 로그 기록 (큐 + 백그라운드 기록, JSON lines, 크기/시간 기준 교체)"""
+import atexit
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from .runtime import LOG_FILE, singleton
+
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 이 크기를 넘으면 교체
+LOG_ROTATE_INTERVAL = 86400      # 크기와 별개로 하루마다 교체(초)
+LOG_BACKUPS = 5                  # debrief.log.1 ~ .5 보관
+LOG_TAIL_SCAN = 4 * 1024 * 1024  # 로그 탭이 필터링 시 뒤에서부터 훑는 최대 바이트
+LOG_LEVELS = ['INFO', 'WARNING', 'ERROR']
+LOG_ERROR_PATTERN = re.compile(r"\b(Err|Error|Fail|Drop)\b")
+
+class LogWriter:
+    """write_log가 쌓은 레코드를 전용 스레드가 모아서 기록 (호출한 스레드는 파일 I/O를 기다리지 않음)"""
+    def __init__(self, path=LOG_FILE, max_bytes=LOG_MAX_BYTES, interval=LOG_ROTATE_INTERVAL, backups=LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backups = backups
+        self.queue = queue.SimpleQueue()
+        self.file = None
+        self.period = None
+        self.thread = threading.Thread(target=self._run, daemon=True, name="DeBrief_Log")
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, record):
+        self.queue.put(record)
+
+    def reopen(self, path):
+        """이후 레코드를 path에 기록 (앞서 쌓인 레코드는 원래 파일에 마저 기록)"""
+        self.queue.put(('reopen', path))
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < 500:
+                try: batch.append(self.queue.get_nowait())
+                except queue.Empty: break
+            done = None in batch
+            try:
+                self._write([r for r in batch if r is not None])
+            except Exception as e: print(f"Log Write Err: {e}")
+            if done:
+                if self.file: self.file.close()
+                return
+
+    def _write(self, records):
+        if not records: return
+        for r in records:
+            if isinstance(r, tuple):
+                if self.file: self.file.close()
+                self.path = r[1]; self.file = None
+                continue
+            self._rotate_if_needed()
+            self.file.write(json.dumps(r, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def _rotate_if_needed(self):
+        now = time.time()
+        if self.file is None:
+            # 재시작 시 기존 파일의 마지막 기록 시점 기준으로 교체 주기 판단
+            self.period = int((os.path.getmtime(self.path) if os.path.exists(self.path) else now) // self.interval)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        if self.file.tell() < self.max_bytes and int(now // self.interval) == self.period: return
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"): os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if os.path.exists(self.path): os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.period = int(now // self.interval)
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=2)
+
+@singleton
+def get_log_writer():
+    return LogWriter()
+
+def worker_log_file(worker_id, path=LOG_FILE):
+    """분담 워커별 로그 파일 (debrief.<워커 id>.log) - 여러 프로세스가 한 파일을 각자 교체하면 기록이 흩어지거나 덮이므로"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{re.sub(r'[^0-9A-Za-z_.-]+', '_', worker_id)}{ext}"
+
+def use_log_file(path):
+    """이 프로세스의 로그 파일 변경 (교체도 이 프로세스가 자기 파일만)"""
+    get_log_writer().reopen(path)
+
+def write_log(msg, level=None, ticker=None):
+    """level을 생략하면 메시지 관례로 추정 ('... Err:' -> ERROR, '⚠️' -> WARNING)"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    level = level or ('ERROR' if LOG_ERROR_PATTERN.search(msg) else 'WARNING' if msg.startswith("⚠️") else 'INFO')
+    print(f"[{timestamp}] {msg}")
+    record = {'ts': timestamp, 'level': level, 'msg': msg}
+    if ticker: record['ticker'] = ticker
+    try: get_log_writer().put(record)
+    except: pass
+
+def parse_log_line(line):
+    try: return json.loads(line)
+    except ValueError:
+        # 교체 이전의 평문 로그 "[YYYY-MM-DD HH:MM:SS] 메시지"
+        m = re.match(r"\[(.{19})\] (.*)", line)
+        if not m: return None
+        return {'ts': m.group(1), 'level': 'ERROR' if LOG_ERROR_PATTERN.search(m.group(2)) else 'INFO', 'msg': m.group(2)}
+
+def tail_log(path=LOG_FILE, limit=50, level=None, ticker=None, block=64 * 1024, max_scan=LOG_TAIL_SCAN):
+    """파일 끝에서부터 블록 단위로 거슬러 읽으며 조건에 맞는 최근 레코드 limit개 (최신순)"""
+    if not os.path.exists(path): return []
+    min_rank = LOG_LEVELS.index(level) if level in LOG_LEVELS else 0
+    out = []; tail = b""
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END); end = pos
+        while pos > 0 and len(out) < limit and end - pos < max_scan:
+            step = min(block, pos); pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + tail
+            lines = chunk.split(b"\n")
+            tail = lines.pop(0) if pos > 0 else b""  # 블록 경계에서 잘린 줄은 다음 블록과 합침
+            for raw in reversed(lines):
+                if not raw.strip(): continue
+                rec = parse_log_line(raw.decode('utf-8', 'replace'))
+                if rec is None or (LOG_LEVELS.index(rec['level']) if rec.get('level') in LOG_LEVELS else 0) < min_rank: continue
+                if ticker and rec.get('ticker') != ticker: continue
+                out.append(rec)
+                if len(out) >= limit: break
+    return out
+
+def log_files(path=LOG_FILE):
+    """기본 로그 + 분담 워커별 로그 파일"""
+    root, ext = os.path.splitext(path)
+    return [path] + sorted(glob.glob(f"{glob.escape(root)}.*{ext}"))
+
+def tail_logs(paths, limit=50, level=None, ticker=None):
+    """여러 로그 파일에서 조건에 맞는 최근 레코드를 시각순으로 합쳐 limit개 (최신순)"""
+    recs = [r for p in paths for r in tail_log(p, limit, level, ticker)]
+    return sorted(recs, key=lambda r: r['ts'], reverse=True)[:limit]
@@ -0,0 +1,132 @@
+"""[0-1] 계측 (외부 호출/감지기별 호출 수, 지연 히스토그램, 오류 유형별 집계)"""
+import bisect
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .logs import write_log
+from .runtime import singleton
+
+METRICS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # 지연 히스토그램 경계(초)
+METRICS_PORT = os.environ.get("DEBRIEF_METRICS_PORT")  # 지정하면 해당 포트의 /metrics 로 Prometheus 텍스트 제공
+
+class Metrics:
+    """단계(stage)별 호출 수/지연/오류와 임의 카운터·게이지. timer는 오류를 세고 다시 던지고, guard는 세고 삼킴"""
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.started_at = time.time()
+        self.hists = {}     # stage -> [버킷별 누적 전 개수..., +Inf 개수], 합계, 개수
+        self.errors = {}    # (stage, 예외 유형) -> 개수
+        self.counters = {}  # (이름, 라벨 튜플) -> 값
+        self.gauges = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock: self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock: self.gauges[self._key(name, labels)] = value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            h = self.hists.get(stage)
+            if h is None: h = self.hists[stage] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            h['buckets'][bisect.bisect_left(self.buckets, seconds)] += 1
+            h['sum'] += seconds; h['count'] += 1
+
+    def error(self, stage, exc):
+        """exc는 예외 객체 또는 'HTTP 429' 같은 유형 문자열"""
+        key = (stage, exc if isinstance(exc, str) else type(exc).__name__)
+        with self.lock: self.errors[key] = self.errors.get(key, 0) + 1
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        started = time.monotonic()
+        try: yield
+        except Exception as e:
+            self.error(stage, e)
+            raise
+        finally: self.observe(stage, time.monotonic() - started)
+
+    @contextlib.contextmanager
+    def guard(self, stage):
+        """실패해도 흐름을 막지 않아야 하는 호출용 (예전 except: pass 자리) - 조용히 버리지 않고 유형별로 집계"""
+        try:
+            with self.timer(stage): yield
+        except Exception: pass
+
+    def _quantile(self, h, q):
+        # 버킷 상한으로 근사 (마지막 버킷은 최대 경계값으로 표시)
+        rank = q * h['count']; seen = 0
+        for bound, n in zip(self.buckets + (self.buckets[-1],), h['buckets']):
+            seen += n
+            if seen >= rank: return bound
+        return self.buckets[-1]
+
+    def summary(self):
+        """단계별 {'stage', 'calls', 'errors', 'avg', 'p50', 'p95'} (호출 수 내림차순)"""
+        with self.lock:
+            hists = {s: dict(h, buckets=list(h['buckets'])) for s, h in self.hists.items()}
+            errors = dict(self.errors)
+        rows = []
+        for stage in sorted(set(hists) | {s for s, _ in errors}):
+            h = hists.get(stage, {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0})
+            n = h['count']
+            rows.append({'stage': stage, 'calls': n, 'errors': sum(v for (s, _), v in errors.items() if s == stage),
+                         'avg': h['sum'] / n if n else 0.0,
+                         'p50': self._quantile(h, 0.5) if n else 0.0, 'p95': self._quantile(h, 0.95) if n else 0.0})
+        return sorted(rows, key=lambda r: -r['calls'])
+
+    def error_summary(self):
+        with self.lock: return sorted(((s, t, n) for (s, t), n in self.errors.items()), key=lambda r: -r[2])
+
+    def prometheus(self):
+        def fmt(labels):
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+        with self.lock:
+            lines = ["# TYPE debrief_latency_seconds histogram"]
+            for stage, h in sorted(self.hists.items()):
+                acc = 0
+                for bound, n in zip(self.buckets + ('+Inf',), h['buckets']):
+                    acc += n
+                    lines.append(f'debrief_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {acc}')
+                lines.append(f'debrief_latency_seconds_sum{{stage="{stage}"}} {h["sum"]:.6f}')
+                lines.append(f'debrief_latency_seconds_count{{stage="{stage}"}} {h["count"]}')
+            lines.append("# TYPE debrief_errors_total counter")
+            for (stage, kind), n in sorted(self.errors.items()):
+                lines.append(f'debrief_errors_total{{stage="{stage}",type="{kind}"}} {n}')
+            for (name, labels), v in sorted(self.counters.items()):
+                lines.append(f"debrief_{name}_total{fmt(labels)} {v}")
+            for (name, labels), v in sorted(self.gauges.items()):
+                lines.append(f"debrief_{name}{fmt(labels)} {v}")
+            lines.append(f"debrief_uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+@singleton
+def get_metrics():
+    return Metrics()
+
+@singleton
+def start_metrics_server(port):
+    """GET /metrics -> Prometheus 텍스트 (DEBRIEF_METRICS_PORT 지정 시에만)"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404); self.end_headers(); return
+            body = get_metrics().prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args): pass
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="DeBrief_Metrics").start()
+    write_log(f"📈 메트릭 엔드포인트 :{port}/metrics")
+    return server
@@ -0,0 +1,335 @@
+"""[2-7] 감시 파이프라인 (스케줄러가 꺼낸 작업 묶음 실행 -> 알림 -> 발신 큐)"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from .config import load_config
+from .earnings import EARNINGS_ALERT_HOUR, earnings_alert, get_earnings_index, next_market_day
+from .logs import write_log
+from .metrics import get_metrics
+from .net import AsyncHttp, aiohttp
+from .outbox import get_telegram_outbox
+from .prices import INDICATOR_OPTIONS, PriceEngine, detect_indicator_alerts, get_quote_cache, move_alert
+from .runtime import MONITOR_INTERVAL, MONITOR_MODE
+from .schedule import MARKET_TZ, SCHED_MAX_RPS, JobScheduler, RateLimiter, effective_quote_max_age, price_request_floor
+from .seen import get_seen_store
+from .state import get_alert_state
+from .sources import get_economic_calendar, get_economic_events, get_integrated_news, get_integrated_news_async, localize_news
+from .stream import PricingData, QuoteStream, ws_connect
+from .subscriptions import EARNINGS_OPTION, MOVE_OPTION, all_tickers, chat_watchlists, eco_chats, fan_out, merge_watchlists
+
+class Monitor:
+    """봇 스레드가 run/run_async로 상시 구동하고, 벤치마크는 run_once로 한 사이클씩 돌림
+
+    수집과 판정은 모든 채팅방의 목록을 합친 종목 단위로 한 번씩 하고, 알림은 (종목, 옵션)을 달아
+    dispatch에서 그 옵션을 켠 채팅방에만 나눠 보낸다. shard(Cluster)를 주면 해시 링에서 이 워커 몫인 종목만,
+    경제 일정과 실적 일정은 리더일 때만 맡는다.
+    """
+    def __init__(self, max_workers=8, shard=None):
+        self.shard = shard
+        self.last_weekly_sent = None
+        self.last_daily_sent = None
+        self.price_engine = PriceEngine()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="DeBrief_Pool")  # 사이클마다 새로 만들지 않음
+        self.scheduler = JobScheduler()
+        self.limiter = RateLimiter(SCHED_MAX_RPS)
+        self.tick_stats = {'ticks': 0, 'jobs': 0, 'alerts': 0, 'busy': 0.0, 'since': time.monotonic()}
+        self.stream = QuoteStream(on_tick=self.on_stream_tick)
+        self.stream_thread = None; self.stream_alerting = frozenset(); self.stream_token = None; self.stream_watchlists = {}
+
+    def owns(self, ticker):
+        return self.shard is None or self.shard.owns(ticker)
+
+    def leads(self):
+        return self.shard is None or self.shard.leader
+
+    def claim(self, key):
+        """여러 워커 중 한 번만 보내야 하는 알림 선점 (단독 실행이면 항상 True)"""
+        return self.shard is None or self.shard.claim(key)
+
+    def own_tickers(self, cfg):
+        return [t for t in all_tickers(cfg) if self.owns(t)]
+
+    def send_eco_digests(self, cfg):
+        chats = eco_chats(cfg)
+        if not chats: return
+        token = cfg['telegram']['bot_token']
+        def broadcast(msg):
+            for chat in chats: get_telegram_outbox().send(token, chat, msg, 'Markdown')
+        now = datetime.now()
+        if now.weekday() == 0 and now.hour == 8 and self.last_weekly_sent != now.strftime('%Y-%m-%d'):
+            events = get_economic_events()
+            if events:
+                msg = "📅 *이번 주 주요 경제 일정*\n────────────────"
+                c=0
+                for e in events:
+                    if e['impact'] == 'High': msg += f"\n🗓️ `{e['date']} {e['time']}`\n🔥 {e['event']}"; c+=1
+                if c>0:
+                    if self.claim(f"weekly:{now:%Y-%m-%d}"): broadcast(msg)
+                    self.last_weekly_sent = now.strftime('%Y-%m-%d')
+        if now.hour == 8 and self.last_daily_sent != now.strftime('%Y-%m-%d'):
+            events = get_economic_events()
+            today = datetime.now().strftime('%Y-%m-%d')
+            todays = [e for e in events if e['day'] == today]
+            if todays:
+                msg = f"☀️ *오늘({today}) 주요 일정*\n────────────────"
+                for e in todays: msg += f"\n⏰ {e['time']} : {e['event']} (예상:{e['forecast']})"
+                if self.claim(f"daily:{today}"): broadcast(msg)
+                self.last_daily_sent = now.strftime('%Y-%m-%d')
+
+        # 발표 직후 실제치 알림
+        for e in get_economic_calendar().watch():
+            if not self.claim(f"eco:{e['id']}"): continue
+            icon = "🔥" if e['impact'] == 'High' else "🔸"
+            msg = (f"{icon} *{e['event']}* 발표\n"
+                   f"📌 실제: `{e['actual']}`  (예상: {e['forecast'] or '-'} / 이전: {e['previous'] or '-'})")
+            broadcast(msg)
+
+    def plan_jobs(self, cfg):
+        # 설정 -> (감지기, 종목) 작업 목록. 배치 작업(price/indicators/eco)은 종목 자리에 None
+        jobs = {('eco', None)} if eco_chats(cfg) and self.leads() else set()
+        if cfg.get('system_active', True) and all_tickers(cfg) and self.leads(): jobs.add(('earnings', None))
+        if not (cfg.get('system_active', True) and self.own_tickers(cfg)): return jobs
+        active = self.active_tickers(cfg)
+        # 대시보드/명령어용 시세 캐시도 같은 배치로 채우므로 감시 여부와 무관하게 전 종목
+        jobs.add(('price', None))
+        self.scheduler.floor['price'] = price_request_floor(len(self.own_tickers(cfg)))
+        if any(s.get(opt) for s in active.values() for opt in INDICATOR_OPTIONS): jobs.add(('indicators', None))
+        for t, s in active.items():
+            if self.wants_news(s): jobs.add(('news', t))
+            if s.get('🏛️ SEC'): jobs.add(('sec', t))
+        return jobs
+
+    def active_tickers(self, cfg):
+        if not cfg.get('system_active', True): return {}
+        return {t: s for t, s in merge_watchlists(chat_watchlists(cfg)).items() if self.owns(t)}
+
+    def run_batch_job(self, kind, cfg):
+        try:
+            with get_metrics().timer(f"job.{kind}"):
+                if kind == 'eco': self.send_eco_digests(cfg); return []
+                if kind == 'earnings': return self.check_earnings(cfg)
+                active = self.active_tickers(cfg)
+                if kind == 'price':
+                    tickers = self.own_tickers(cfg)
+                    self.price_engine.refresh(tickers)
+                    # yf.download는 종목당 요청 1건씩 (일봉 + 분봉) - 보낸 만큼 사후 차감해 뒤이은 피드 요청이 한도를 지키게
+                    self.limiter.charge(2 * len(tickers))
+                    return self.check_move_alerts(active)
+                if kind == 'indicators':
+                    with self.price_engine.lock: snap = self.price_engine.snapshot
+                    if snap.empty: return []
+                    return detect_indicator_alerts(snap[snap.index.isin(list(active))], active)
+        except Exception as e: write_log(f"Job Err [{kind}]: {e}")
+        return []
+
+    def finish_news(self, cfg, fetched):
+        # 한 묶음에서 받은 피드를 종목별로 모아 채팅방별 중복 제거 -> 남은 것만 일괄 번역 -> 받을 채팅방을 정해 알림
+        active = self.active_tickers(cfg)
+        watchlists = chat_watchlists(cfg)
+        fresh = {}
+        for (kind, t), items in fetched.items():
+            if t not in active: continue
+            for i in items:
+                # 옵션상 받을 채팅방만 남긴 뒤 중복 제거 - 뉴스를 끈 채팅방/종목이 재배포 기사를 선점해 다른 알림까지 막지 않도록
+                opt = self.news_option(active[t], i)
+                chats = [c for c, tickers in watchlists.items() if opt and tickers.get(t, {}).get(opt)]
+                if chats: fresh.setdefault(t, []).append((i, chats))
+        fresh = get_seen_store().filter_new(fresh)
+        localize_news([i for pairs in fresh.values() for i, _ in pairs])
+        messages = []; sent_news = {}
+        for t, pairs in fresh.items():
+            if not pairs: continue
+            msgs, sent = self.build_news_alerts(t, active[t], pairs)
+            messages += msgs
+            if sent:
+                sent_news[t] = sent
+                write_log(f"🔔 뉴스/공시 알림 {len(sent)}건", ticker=t)
+        get_seen_store().mark(sent_news)
+        return messages
+
+    def split_tick(self, due):
+        # 지표 판정은 같은 묶음의 가격 갱신이 끝난 스냅샷으로 하도록 price -> indicators 순서로 한 작업에
+        batch = [[k for k in ('price', 'indicators') if (k, None) in due], [k for k in ('eco', 'earnings') if (k, None) in due]]
+        return [kinds for kinds in batch if kinds], [k for k in due if k[1] is not None]
+
+    def run_batch_jobs(self, kinds, cfg):
+        return [m for kind in kinds for m in self.run_batch_job(kind, cfg)]
+
+    def run_tick_sync(self, cfg, due):
+        batch, feeds = self.split_tick(due)
+        jobs = [self.executor.submit(self.run_batch_jobs, kinds, cfg) for kinds in batch]
+        fetched = dict(zip(feeds, self.executor.map(lambda k: self.collect_feed(*k), feeds)))
+        messages = [m for j in jobs for m in j.result()]
+        return messages + (self.finish_news(cfg, fetched) if feeds else [])
+
+    async def run_tick_async(self, http, cfg, due):
+        loop = asyncio.get_running_loop()
+        batch, feeds = self.split_tick(due)
+        # yfinance 배치 요청은 동기 API라 풀에서 돌리고, 그동안 RSS는 루프에서 동시 처리
+        jobs = [loop.run_in_executor(self.executor, self.run_batch_jobs, kinds, cfg) for kinds in batch]
+        fetched = dict(zip(feeds, await asyncio.gather(*(self.collect_feed_async(http, *k) for k in feeds))))
+        messages = [m for msgs in await asyncio.gather(*jobs) for m in msgs]
+        if feeds: messages += await loop.run_in_executor(self.executor, self.finish_news, cfg, fetched)
+        return messages
+
+    def dispatch(self, cfg, due, messages, started):
+        for chat, msgs in fan_out(messages, chat_watchlists(cfg)).items():
+            get_telegram_outbox().send_batch(cfg['telegram']['bot_token'], chat, msgs)
+        self.tick_stats['ticks'] += 1; self.tick_stats['jobs'] += len(due); self.tick_stats['alerts'] += len(messages)
+        self.tick_stats['busy'] += time.monotonic() - started
+        get_metrics().inc('alerts', len(messages))
+        get_metrics().observe('tick', time.monotonic() - started)
+
+    def report_ticks(self, mode):
+        # 작업이 몇 초 간격으로 흩어져 돌기 때문에 로그는 MONITOR_INTERVAL마다 집계해서 한 줄
+        now = time.monotonic()
+        if now - self.tick_stats['since'] < MONITOR_INTERVAL: return
+        ob = get_telegram_outbox().stats()
+        metrics = get_metrics()
+        metrics.set('outbox_depth', ob['depth']); metrics.set('scheduled_jobs', len(self.scheduler.due))
+        metrics.set('stream_connected', int(self.stream.connected))
+        if self.tick_stats['jobs']:
+            write_log(f"⏱️ 스케줄러 [{mode}/{self.scheduler.session}] 작업 {self.tick_stats['jobs']} ({self.tick_stats['ticks']}회) · "
+                      f"실행 {self.tick_stats['busy']:.2f}s · 대기열 {len(self.scheduler.due)} · 알림 {self.tick_stats['alerts']} · "
+                      f"발신대기 {ob['depth']} (p95 {ob['latency_p95']:.1f}s)"
+                      + (f" · 스트림 {'연결' if self.stream.connected else '끊김'} 틱 {self.stream.ticks}" if self.stream.want else ""))
+        self.tick_stats.update(ticks=0, jobs=0, alerts=0, busy=0.0, since=now)
+
+    def run(self):
+        if MONITOR_MODE == 'async' and aiohttp is not None:
+            asyncio.run(self.run_async())
+            return
+        while True:
+            try:
+                cfg = load_config()
+                self.scheduler.sync(self.plan_jobs(cfg))
+                self.sync_stream(cfg)
+                due = self.scheduler.pop_due()
+                if due:
+                    started = time.monotonic()
+                    self.dispatch(cfg, due, self.run_tick_sync(cfg, due), started)
+                self.report_ticks('thread')
+            except Exception as e:
+                get_metrics().error('loop', e)
+                write_log(f"Loop Err: {e}")
+            time.sleep(self.scheduler.wait_time())
+
+    async def run_async(self):
+        async with AsyncHttp() as http:
+            while True:
+                try:
+                    cfg = load_config()
+                    self.scheduler.sync(self.plan_jobs(cfg))
+                    self.sync_stream(cfg)
+                    due = self.scheduler.pop_due()
+                    if due:
+                        started = time.monotonic()
+                        self.dispatch(cfg, due, await self.run_tick_async(http, cfg, due), started)
+                    self.report_ticks('async')
+                except Exception as e:
+                    get_metrics().error('loop', e)
+                    write_log(f"Loop Err: {e}")
+                await asyncio.sleep(self.scheduler.wait_time())
+
+    def check_move_alerts(self, tickers):
+        # 가격 (3%) - 시세 캐시 기준, 허용 지연을 넘긴 시세로는 알리지 않음 -> (종목, 옵션, 본문, parse_mode) 목록
+        alerts = []
+        want = [t for t, s in tickers.items() if s.get(MOVE_OPTION)]
+        if not want: return alerts
+        want = [t for t in want if not self.stream.is_live(t)]  # 스트림이 살아 있는 종목은 틱마다 이미 판정
+        quotes = get_quote_cache().frame(want, effective_quote_max_age())
+        for ticker, row in quotes.iterrows():
+            alert = move_alert(ticker, row['pct'], row['price'], row['session'])
+            if alert: alerts.append((ticker, MOVE_OPTION, *alert))
+        return alerts
+
+    def check_earnings(self, cfg):
+        # 실적 일정 색인은 하루 한 번 별도 스레드에서 일괄 갱신하고 여기선 읽기만, 장 마감 뒤엔 다음 거래일 발표 종목을 종목당 한 번 알림
+        index = get_earnings_index()
+        index.refresh_in_background(self.limiter)
+        now = datetime.now(MARKET_TZ)
+        if now.hour < EARNINGS_ALERT_HOUR: return []
+        day = next_market_day(now.date())
+        watched = merge_watchlists(chat_watchlists(cfg))
+        alerts = []
+        for ticker, session in index.on(day.isoformat()).items():
+            if ticker not in watched: continue
+            # 알림 상태에 마지막으로 알린 발표일을 두어 재시작/다음 회차에도 한 번만
+            if get_alert_state().update('earnings', ticker, lambda _: day.isoformat())[0] == day.isoformat(): continue
+            if not self.claim(f"earnings:{ticker}:{day}"): continue
+            alerts.append((ticker, EARNINGS_OPTION, earnings_alert(ticker, day, session, now.date()), 'Markdown'))
+        return alerts
+
+    def on_stream_tick(self, ticker, price, pct, session=None):
+        if ticker not in self.stream_alerting: return
+        alert = move_alert(ticker, pct, price, session)
+        if not alert: return
+        for chat, msgs in fan_out([(ticker, MOVE_OPTION, *alert)], self.stream_watchlists).items():
+            get_telegram_outbox().send_batch(self.stream_token, chat, msgs)
+
+    def sync_stream(self, cfg):
+        # 설정의 quote_stream이 켜져 있을 때만 스트림 스레드를 띄우고 구독 목록을 맞춤
+        if not cfg.get('quote_stream') or not cfg.get('system_active', True):
+            self.stream.configure(()); return
+        if ws_connect is None or PricingData is None:
+            if self.stream_thread is None: write_log("⚠️ websockets/yfinance 스트림 모듈 없음 - 폴링으로만 감시"); self.stream_thread = False
+            return
+        if not self.stream_thread:
+            self.stream_thread = threading.Thread(target=lambda: asyncio.run(self.stream.run()), daemon=True, name="DeBrief_Stream")
+            self.stream_thread.start()
+        self.stream_watchlists = chat_watchlists(cfg)
+        self.stream_alerting = frozenset(t for t, s in self.active_tickers(cfg).items() if s.get(MOVE_OPTION))
+        self.stream_token = cfg['telegram']['bot_token']
+        self.stream.configure(self.own_tickers(cfg))
+
+    def wants_news(self, settings):
+        return settings.get('📰 뉴스') or settings.get('🏛️ SEC')
+
+    def collect_feed(self, kind, ticker):
+        # 원문 그대로 수집 -> 묶음 단위로 중복 제거 후 남은 것만 한 번에 번역
+        try:
+            self.limiter.acquire()
+            with get_metrics().timer(f"job.{kind}"): return get_integrated_news(ticker, kind == 'sec', translate=False)
+        except Exception as e:
+            write_log(f"Feed Err [{kind}]: {e}", ticker=ticker)
+            return []
+
+    async def collect_feed_async(self, http, kind, ticker):
+        try:
+            await self.limiter.acquire_async()
+            with get_metrics().timer(f"job.{kind}"): return await get_integrated_news_async(http, ticker, kind == 'sec')
+        except Exception as e:
+            write_log(f"Feed Err [{kind}]: {e}", ticker=ticker)
+            return []
+
+    def news_option(self, settings, item):
+        """기사를 보낼 옵션('🏛️ SEC' / '📰 뉴스'), 그 종목에서 꺼져 있으면 None (번역 전 원문 제목으로 판정)"""
+        is_sec = item['prefix'] == "🏛️" or "SEC" in item['raw_title'] or "8-K" in item['raw_title']
+        opt = '🏛️ SEC' if is_sec else '📰 뉴스'
+        return opt if settings.get(opt) else None
+
+    def build_news_alerts(self, ticker, settings, pairs):
+        # pairs: [(기사, 받을 채팅방)] -> 채팅방을 지정한 알림 (같은 기사를 이미 받은 채팅방은 건너뜀)
+        messages = []; sent = []
+        for item, chats in pairs:
+            opt = self.news_option(settings, item)
+            if opt:
+                prefix = "🏛️" if opt == '🏛️ SEC' else "📰"
+                messages.append((ticker, opt, f"🔔 {prefix} *[{ticker}]*\n`[{item['date']}]` [{item['title']}]({item['link']})", "Markdown", chats))
+                sent.append((item, chats))
+        return messages, sent
+
+    def run_once(self, cfg=None, mode=MONITOR_MODE):
+        """예약 시각과 무관하게 설정상의 모든 작업을 한 묶음으로 한 번 실행하고 만든 알림 목록을 반환 (벤치마크/점검용)"""
+        cfg = cfg or load_config()
+        due = sorted(self.plan_jobs(cfg), key=str)
+        started = time.monotonic()
+        if mode == 'async' and aiohttp is not None:
+            async def once():
+                async with AsyncHttp() as http: return await self.run_tick_async(http, cfg, due)
+            messages = asyncio.run(once())
+        else: messages = self.run_tick_sync(cfg, due)
+        self.dispatch(cfg, due, messages, started)
+        return messages
@@ -0,0 +1,48 @@
+"""[1-1] HTTP 세션 풀 (keep-alive 재사용 + 호스트별 동시성 제한)"""
+import asyncio
+import os
+import requests
+from urllib.parse import urlsplit
+from .runtime import singleton
+try: import aiohttp
+except ImportError: aiohttp = None  # 없으면 스레드 모드로 동작
+
+HTTP_POOL_SIZE = 20
+HOST_CONCURRENCY = {"api.telegram.org": 5, "news.google.com": 8, "api.jsonbin.io": 2, "finviz.com": 2}
+DEFAULT_HOST_CONCURRENCY = 4
+TELEGRAM_API = os.environ.get("DEBRIEF_TELEGRAM_API", "https://api.telegram.org")
+
+@singleton
+def get_http_session():
+    """동기 경로(JSONBin, RSS, 텔레그램, Finviz 폴백)가 함께 쓰는 keep-alive 세션"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount('https://', adapter); session.mount('http://', adapter)
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    return session
+
+class AsyncHttp:
+    """이벤트 루프 하나에서 공유하는 aiohttp 세션. 호스트별 세마포어로 동시 요청 수를 제한"""
+    def __init__(self):
+        self.session = None
+        self.sems = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE * 2, ttl_dns_cache=300, keepalive_timeout=75)
+        self.session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": "Mozilla/5.0"})
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def _sem(self, url):
+        host = urlsplit(url).hostname
+        if host not in self.sems:
+            self.sems[host] = asyncio.Semaphore(HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY))
+        return self.sems[host]
+
+    async def request(self, method, url, timeout=10, **kwargs):
+        """(status, headers, body) 반환"""
+        async with self._sem(url):
+            async with self.session.request(method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as resp:
+                return resp.status, resp.headers, await resp.read()
@@ -0,0 +1,140 @@
+"""[1-2] 텔레그램 발신 큐 (속도 제한, 재시도, 묶음 전송)"""
+import threading
+import time
+from collections import deque
+from .logs import write_log
+from .metrics import get_metrics
+from .net import TELEGRAM_API, get_http_session
+from .runtime import singleton
+
+TELEGRAM_GLOBAL_RATE = 25       # 초당 전체 전송 수 (공식 한도 30)
+TELEGRAM_CHAT_INTERVAL = 1.1    # 같은 채팅방 연속 전송 최소 간격(초)
+TELEGRAM_MAX_RETRIES = 5
+TELEGRAM_MAX_LEN = 4096
+ALERT_DIGEST_THRESHOLD = 4      # 한 사이클 알림이 이보다 많으면 묶음 메시지로 전송
+
+def merge_alerts(messages, limit=TELEGRAM_MAX_LEN):
+    """여러 알림을 길이 제한 안에서 묶음 메시지들로 합침 -> [(본문, parse_mode)]"""
+    parse_mode = "Markdown" if any(pm for _, pm in messages) else None
+    merged, cur = [], f"🔔 *알림 {len(messages)}건*"
+    for text, _ in messages:
+        if len(cur) + len(text) + 2 > limit:
+            merged.append((cur, parse_mode)); cur = text
+        else: cur += "\n\n" + text
+    merged.append((cur, parse_mode))
+    return merged
+
+class TelegramOutbox:
+    """모든 알림이 거쳐 가는 단일 발신 큐
+
+    채팅방별 간격과 전체 초당 한도에 맞춰 보내고, 429는 retry_after만큼 해당 채팅방을 멈추며,
+    네트워크/5xx 오류는 지수 백오프로 재시도한다. 같은 채팅방 메시지는 들어온 순서대로 나간다.
+    """
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.queue = deque()
+        self.chat_ready = {}                 # chat_id -> 다음 전송 가능 시각
+        self.recent = deque()                # 최근 1초 내 전송 시각 (전체 한도)
+        self.latencies = deque(maxlen=500)   # 큐 진입 -> 전송 완료(초)
+        self.counters = {'sent': 0, 'failed': 0, 'retried': 0, 'rate_limited': 0, 'merged': 0}
+        threading.Thread(target=self._run, daemon=True, name="DeBrief_Outbox").start()
+
+    # --- 넣기 ---
+    def send(self, token, chat_id, text, parse_mode=None):
+        if not token or not chat_id: return
+        msg = {'token': token, 'chat_id': str(chat_id), 'text': text, 'parse_mode': parse_mode,
+               'enqueued_at': time.time(), 'attempts': 0, 'not_before': 0}
+        with self.cond:
+            self.queue.append(msg)
+            self.cond.notify()
+
+    def send_batch(self, token, chat_id, messages):
+        """한 사이클의 알림 묶음. 많으면 digest로 합쳐 메시지 수를 줄임"""
+        if len(messages) > ALERT_DIGEST_THRESHOLD:
+            with self.cond: self.counters['merged'] += len(messages)
+            messages = merge_alerts(messages)
+        for text, parse_mode in messages: self.send(token, chat_id, text, parse_mode)
+
+    # --- 꺼내기 ---
+    def _next(self):
+        with self.cond:
+            while True:
+                now = time.time()
+                while self.recent and now - self.recent[0] > 1: self.recent.popleft()
+                wake = now + 60
+                if len(self.recent) >= TELEGRAM_GLOBAL_RATE:
+                    wake = self.recent[0] + 1
+                else:
+                    blocked = set()
+                    for msg in self.queue:
+                        chat = msg['chat_id']
+                        if chat in blocked: continue  # 채팅방 내 순서 유지
+                        ready = max(msg['not_before'], self.chat_ready.get(chat, 0))
+                        if ready <= now:
+                            self.queue.remove(msg)
+                            self.recent.append(now)
+                            self.chat_ready[chat] = now + TELEGRAM_CHAT_INTERVAL
+                            return msg
+                        blocked.add(chat); wake = min(wake, ready)
+                self.cond.wait(timeout=max(0.05, wake - now))
+
+    def _post(self, msg):
+        data = {"chat_id": msg['chat_id'], "text": msg['text']}
+        if msg['parse_mode']: data["parse_mode"] = msg['parse_mode']
+        resp = get_http_session().post(f"{TELEGRAM_API}/bot{msg['token']}/sendMessage", data=data, timeout=10)
+        try: payload = resp.json()
+        except: payload = {}
+        return resp.status_code, payload
+
+    def _retry(self, msg, delay):
+        with self.cond:
+            msg['attempts'] += 1
+            if msg['attempts'] > TELEGRAM_MAX_RETRIES:
+                self.counters['failed'] += 1
+                write_log(f"Telegram Drop ({msg['chat_id']}): 재시도 초과")
+                return
+            self.counters['retried'] += 1
+            msg['not_before'] = time.time() + delay
+            self.queue.appendleft(msg)
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            msg = self._next()
+            try:
+                with get_metrics().timer('telegram.send'): status, payload = self._post(msg)
+            except Exception as e:
+                write_log(f"Telegram Err: {e}")
+                self._retry(msg, 2 ** msg['attempts'])
+                continue
+
+            if status != 200: get_metrics().error('telegram.send', f"HTTP {status}")
+            if status == 200:
+                with self.cond:
+                    self.counters['sent'] += 1
+                    self.latencies.append(time.time() - msg['enqueued_at'])
+            elif status == 429:
+                wait = payload.get('parameters', {}).get('retry_after', 5)
+                with self.cond:
+                    self.counters['rate_limited'] += 1
+                    self.chat_ready[msg['chat_id']] = time.time() + wait
+                self._retry(msg, wait)
+            elif status == 400 and msg['parse_mode'] and 'parse' in str(payload.get('description', '')):
+                # 마크다운 파싱 실패 -> 일반 텍스트로 재전송
+                msg['parse_mode'] = None
+                self._retry(msg, 0)
+            elif status >= 500:
+                self._retry(msg, 2 ** msg['attempts'])
+            else:
+                with self.cond: self.counters['failed'] += 1
+                write_log(f"Telegram Fail ({status}): {payload.get('description', '')}")
+
+    def stats(self):
+        with self.cond:
+            lat = sorted(self.latencies)
+            pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] if lat else 0.0
+            return dict(self.counters, depth=len(self.queue), latency_p50=pick(0.5), latency_p95=pick(0.95))
+
+@singleton
+def get_telegram_outbox():
+    return TelegramOutbox()
@@ -0,0 +1,422 @@
+"""[2-1] 가격 엔진 (전 종목 배치 시세)"""
+import atexit
+import os
+import threading
+import time
+import pandas as pd
+import yfinance as yf
+from datetime import datetime, timedelta
+from .logs import write_log
+from .metrics import get_metrics
+from .runtime import singleton
+from .schedule import MARKET_TZ
+from .state import get_alert_state
+
+PRICE_DAILY_PERIOD = "1y"       # RSI/이평/52주 고가 등 일봉 지표용 (최초 백필 기간)
+PRICE_INTRADAY_INTERVAL = "5m"  # 현재가 산출용 분봉
+BAR_STORE_DIR = 'debrief_bars'
+BAR_STORE_SAVE_INTERVAL = 300   # 봉 저장소 디스크 반영 간격(초)
+BAR_BACKFILL_PERIOD = {"1d": PRICE_DAILY_PERIOD, PRICE_INTRADAY_INTERVAL: "1d"}
+BAR_KEEP_ROWS = {"1d": 300}     # 분봉은 최근 2일치만 보관
+RSI_PERIOD = 14
+VOLUME_AVG_DAYS = 20
+HIGH_LOOKBACK_DAYS = 252        # 52주
+MA_FAST, MA_SLOW = 20, 60
+BB_PERIOD, BB_K = 20, 2
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+INDICATOR_COLUMNS = ['rsi', 'vol_ratio', 'high_52w', 'ma_fast', 'ma_slow', 'bb_mid', 'bb_std',
+                     'bb_upper', 'bb_lower', 'macd', 'macd_signal']
+
+def download_bars(tickers, period, interval, start=None):
+    """yf.download 한 번으로 여러 종목의 봉 데이터를 (필드, 티커) 컬럼 프레임으로 받아옴 (start 지정 시 그 이후만)"""
+    try:
+        span = {'start': start} if start is not None else {'period': period}
+        with get_metrics().timer(f'yfinance.download.{interval}'):
+            df = yf.download(tickers, interval=interval, group_by='column',
+                             auto_adjust=True, threads=True, progress=False, **span)
+    except Exception as e:
+        write_log(f"Price Download Err ({interval}): {e}")
+        return pd.DataFrame()
+    if df is None or df.empty: return pd.DataFrame()
+    if not isinstance(df.columns, pd.MultiIndex):
+        df.columns = pd.MultiIndex.from_product([df.columns, tickers])
+    return df
+
+def compute_rsi(close, period=RSI_PERIOD):
+    """종가 프레임(날짜 x 티커) 전체에 대해 한 번에 RSI 계산 (Wilder 평활)"""
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / period, adjust=False).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+class WilderRSI:
+    """종목별 Wilder 평균 이득/손실을 보관해 확정된 새 봉마다 O(1)로 갱신
+
+    종가 프레임의 마지막 행은 진행 중인 봉으로 보고 확정 상태에는 넣지 않으며,
+    현재 RSI는 확정 상태 + 마지막 종가로 즉석 계산한다.
+    """
+    def __init__(self, period=RSI_PERIOD):
+        self.period = period
+        self.state = pd.DataFrame(columns=['avg_gain', 'avg_loss', 'close', 'as_of'])
+
+    def _seed(self, committed):
+        # 처음 보는 종목(또는 봉이 모자라 초기화가 안 된 종목)을 저장된 봉 전체로 한 번 초기화
+        a = 1 / self.period
+        delta = committed.diff()
+        return pd.DataFrame({
+            'avg_gain': delta.clip(lower=0).ewm(alpha=a, adjust=False).mean().iloc[-1],
+            'avg_loss': (-delta).clip(lower=0).ewm(alpha=a, adjust=False).mean().iloc[-1],
+            'close': committed.ffill().iloc[-1],
+            'as_of': committed.index[-1],
+        })
+
+    def _step(self, st, close):
+        n = self.period
+        delta = close - st['close']
+        return ((st['avg_gain'] * (n - 1) + delta.clip(lower=0)) / n,
+                (st['avg_loss'] * (n - 1) + (-delta).clip(lower=0)) / n)
+
+    def update(self, close):
+        if len(close) < 2: return pd.Series(float('nan'), index=close.columns)
+        committed = close.iloc[:-1]
+        # 확정 종가가 2개 이상 있어야 초기화 - 받은 봉이 전부 NaN이던 종목은 상태를 만들지 않고 다음 사이클에 다시 시도
+        unseeded = self.state.index[self.state[['avg_gain', 'avg_loss', 'close']].isna().any(axis=1)]
+        seed = [t for t in close.columns if (t not in self.state.index or t in unseeded) and committed[t].count() >= 2]
+        if seed: self.state = pd.concat([self.state[~self.state.index.isin(seed)], self._seed(committed[seed])])
+
+        # 지난 사이클 이후 확정된 봉만 반영 (보통 하루 한 줄)
+        known = [t for t in close.columns if t in self.state.index]
+        st = self.state.loc[known]
+        pending = committed[committed.index > st['as_of'].min()]
+        for date, row in pending.iterrows():
+            mask = (st['as_of'] < date) & row.notna()
+            if not mask.any(): continue
+            gain, loss = self._step(st[mask], row[mask])
+            st.loc[mask, 'avg_gain'] = gain; st.loc[mask, 'avg_loss'] = loss
+            st.loc[mask, 'close'] = row[mask]; st.loc[mask, 'as_of'] = date
+        self.state.loc[st.index] = st
+
+        st = st.reindex(close.columns)  # 초기화 못 한 종목은 NaN
+        last = close.iloc[-1]
+        gain, loss = self._step(st, last)
+        gain = gain.where(last.notna(), st['avg_gain']); loss = loss.where(last.notna(), st['avg_loss'])
+        return (100 - 100 / (1 + gain.astype(float) / loss.astype(float)))
+
+def compute_indicators(daily, rsi=None):
+    """일봉 OHLCV 프레임 하나로 전 종목의 지표를 컬럼 단위 벡터 연산으로 계산 (티커별 루프 없음)"""
+    close = daily['Close']
+    out = pd.DataFrame(index=close.columns)
+    out['rsi'] = rsi.reindex(out.index) if rsi is not None else compute_rsi(close).iloc[-1]
+
+    if 'Volume' in daily:
+        vol = daily['Volume']
+        out['vol_ratio'] = vol.iloc[-1] / vol.shift(1).rolling(VOLUME_AVG_DAYS).mean().iloc[-1]
+    else: out['vol_ratio'] = float('nan')
+
+    # 오늘 봉을 제외한 직전 52주 고가
+    high = daily['High'] if 'High' in daily else close
+    out['high_52w'] = high.iloc[:-1].tail(HIGH_LOOKBACK_DAYS).max()
+
+    out['ma_fast'] = close.rolling(MA_FAST).mean().iloc[-1]
+    out['ma_slow'] = close.rolling(MA_SLOW).mean().iloc[-1]
+
+    out['bb_mid'] = close.rolling(BB_PERIOD).mean().iloc[-1]
+    out['bb_std'] = close.rolling(BB_PERIOD).std().iloc[-1]
+    out['bb_upper'] = out['bb_mid'] + BB_K * out['bb_std']
+    out['bb_lower'] = out['bb_mid'] - BB_K * out['bb_std']
+
+    macd = close.ewm(span=MACD_FAST, adjust=False).mean() - close.ewm(span=MACD_SLOW, adjust=False).mean()
+    out['macd'] = macd.iloc[-1]
+    out['macd_signal'] = macd.ewm(span=MACD_SIGNAL, adjust=False).mean().iloc[-1]
+    return out
+
+def session_day(ts):
+    """시각 -> 그 시각이 속한 뉴욕 거래일 'YYYY-MM-DD' (epoch 초, 시간대 있는 분봉 시각, 시간대 없는 일봉 날짜)"""
+    if ts is None or pd.isna(ts): return None
+    if isinstance(ts, (int, float)): return datetime.fromtimestamp(ts, MARKET_TZ).strftime('%Y-%m-%d')
+    ts = pd.Timestamp(ts)
+    return (ts.tz_convert(MARKET_TZ) if ts.tzinfo is not None else ts).strftime('%Y-%m-%d')
+
+def build_snapshot(daily, intraday, rsi=None):
+    """일봉/분봉 프레임에서 티커별 현재가, 전일종가, 등락률, 지표 스냅샷 생성
+
+    session은 종목별 마지막 봉이 속한 거래일 - 휴장 중에도 직전 거래일 등락률이 그대로 나오므로
+    급등락 알림 상태는 벽시계가 아니라 이 날짜로 구분한다.
+    """
+    d_close = daily['Close'] if not daily.empty else pd.DataFrame()
+    i_close = intraday['Close'] if not intraday.empty else pd.DataFrame()
+    if d_close.empty and i_close.empty: return pd.DataFrame()
+
+    src = i_close if not i_close.empty else d_close
+    last = src.ffill().iloc[-1]
+    session = src.index[-1].date()
+
+    snap = pd.DataFrame({'price': last})
+    snap['session'] = src.apply(pd.Series.last_valid_index).map(session_day)
+    if not d_close.empty:
+        prior = d_close[d_close.index.date < session]
+        prev = prior.ffill().iloc[-1] if not prior.empty else pd.Series(dtype=float)
+        snap['prev_close'] = prev
+        snap['pct'] = (snap['price'] - snap['prev_close']) / snap['prev_close'] * 100
+        snap = snap.join(compute_indicators(daily, rsi))
+    else:
+        snap['prev_close'] = float('nan'); snap['pct'] = float('nan')
+        for col in INDICATOR_COLUMNS: snap[col] = float('nan')
+    snap.index.name = 'ticker'
+    return snap
+
+class BarStore:
+    """봉 데이터 로컬 저장소 (주기별 parquet 한 파일, 컬럼 = '필드|티커')
+
+    처음 보는 종목만 전체 기간을 한 번 백필하고, 이후에는 저장된 마지막 봉 시점부터의
+    새 봉만 배치로 받아 덮어쓴다. 디스크 저장은 BAR_STORE_SAVE_INTERVAL 간격으로 묶어서 한다.
+    """
+    def __init__(self, path=BAR_STORE_DIR):
+        self.path = path
+        self.lock = threading.Lock()
+        self.frames = {}
+        self.saved_at = {}
+
+    def _file(self, interval):
+        return os.path.join(self.path, f"bars_{interval}.parquet")
+
+    def frame(self, interval):
+        with self.lock:
+            if interval not in self.frames:
+                df = pd.DataFrame()
+                try:
+                    if os.path.exists(self._file(interval)):
+                        df = pd.read_parquet(self._file(interval))
+                        df.columns = pd.MultiIndex.from_tuples([tuple(c.split('|', 1)) for c in df.columns])
+                except Exception as e:
+                    get_metrics().error('barstore.load', e)
+                    write_log(f"BarStore Load Err ({interval}): {e}")
+                self.frames[interval] = df
+                self.saved_at[interval] = time.time()
+            return self.frames[interval]
+
+    def _save(self, interval, df):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            flat = df.copy()
+            flat.columns = [f"{f}|{t}" for f, t in flat.columns]
+            tmp = f"{self._file(interval)}.tmp"
+            flat.to_parquet(tmp)
+            os.replace(tmp, self._file(interval))
+            self.saved_at[interval] = time.time()
+        except Exception as e:
+            get_metrics().error('barstore.save', e)
+            write_log(f"BarStore Save Err ({interval}): {e}")
+
+    def save_all(self):
+        for interval, df in list(self.frames.items()):
+            if not df.empty: self._save(interval, df)
+
+    def update(self, tickers, interval):
+        """tickers의 최신 봉을 반영한 (필드, 티커) 프레임 반환"""
+        df = self.frame(interval)
+        close = df['Close'] if not df.empty else pd.DataFrame()
+        known = [t for t in tickers if t in close.columns and close[t].notna().any()]
+        missing = [t for t in tickers if t not in known]
+
+        parts = []
+        if missing:
+            parts.append(download_bars(missing, BAR_BACKFILL_PERIOD[interval], interval))
+        if known:
+            # 종목별 마지막 봉 중 가장 이른 시점부터 (그 봉 자체도 다시 받아 미완성 봉을 갱신)
+            start = close[known].apply(lambda c: c.last_valid_index()).min()
+            parts.append(download_bars(known, None, interval, start=start))
+
+        for part in parts:
+            if part.empty: continue
+            df = part.combine_first(df) if not df.empty else part
+        if not df.empty:
+            df = df.sort_index()
+            df = df.tail(BAR_KEEP_ROWS[interval]) if interval == '1d' else df[df.index >= df.index[-1] - timedelta(days=2)]
+        with self.lock:
+            self.frames[interval] = df
+            due = time.time() - self.saved_at.get(interval, 0) >= BAR_STORE_SAVE_INTERVAL
+        if due and not df.empty: self._save(interval, df)
+        if df.empty: return df
+        return df.loc[:, df.columns.get_level_values(1).isin(tickers)]
+
+@singleton
+def get_bar_store():
+    store = BarStore()
+    atexit.register(store.save_all)
+    return store
+
+class PriceEngine:
+    """감시 종목 전체를 사이클당 배치 요청(일봉+분봉)으로 받아 공유하는 시세 엔진"""
+    def __init__(self, bars=None):
+        self.lock = threading.Lock()
+        self.bars = bars or get_bar_store()
+        self.rsi = WilderRSI()
+        self.daily = pd.DataFrame()
+        self.intraday = pd.DataFrame()
+        self.snapshot = pd.DataFrame()
+        self.updated_at = None
+
+    def refresh(self, tickers):
+        tickers = sorted(set(tickers))
+        if not tickers: return self.snapshot
+        daily = self.bars.update(tickers, "1d")
+        intraday = self.bars.update(tickers, PRICE_INTRADAY_INTERVAL)
+        rsi = self.rsi.update(daily['Close']) if not daily.empty else None
+        snap = build_snapshot(daily, intraday, rsi)
+        with self.lock:
+            self.daily, self.intraday, self.snapshot = daily, intraday, snap
+            self.updated_at = datetime.now()
+        get_quote_cache().publish(snap)
+        return snap
+
+    def quote(self, ticker):
+        with self.lock:
+            if ticker in self.snapshot.index: return self.snapshot.loc[ticker]
+        return None
+
+STREAM_STALE = 30  # 이 시간 안에 틱이 있던 종목만 스트림이 담당 (나머지는 폴링)
+
+class QuoteCache:
+    """대시보드, /p, /summary, 급등락 감지가 함께 읽는 시세 캐시 (백그라운드 워커가 배치로 갱신)"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.quotes = {}  # ticker -> {'price', 'prev_close', 'pct', 'session', 'updated_at', 'source'}
+
+    def publish(self, snap):
+        if snap.empty: return
+        now = time.time()
+        rows = snap[['price', 'prev_close', 'pct', 'session']].dropna(subset=['price']).to_dict('index')
+        with self.lock:
+            for t, q in rows.items():
+                cur = self.quotes.get(t)
+                if cur and cur.get('source') == 'stream' and now - cur['updated_at'] < STREAM_STALE: continue  # 스트림 시세가 더 최신
+                self.quotes[t] = dict(q, updated_at=now, source='poll')
+
+    def tick(self, ticker, price, prev_close, pct, ts=None, session=None):
+        """실시간 스트림 체결가 반영 (session: 체결 시각의 거래일)"""
+        ts = ts or time.time()
+        with self.lock:
+            self.quotes[ticker] = {'price': price, 'prev_close': prev_close, 'pct': pct, 'session': session or session_day(ts),
+                                   'updated_at': ts, 'source': 'stream'}
+
+    def get(self, ticker, max_age=None):
+        with self.lock: q = self.quotes.get(ticker)
+        if q is None or (max_age is not None and time.time() - q['updated_at'] > max_age): return None
+        return dict(q)
+
+    def frame(self, tickers, max_age=None):
+        """max_age 안에 갱신된 시세만 (ticker 인덱스) 프레임으로"""
+        now = time.time()
+        with self.lock:
+            rows = {t: self.quotes[t] for t in tickers if t in self.quotes
+                    and (max_age is None or now - self.quotes[t]['updated_at'] <= max_age)}
+        return pd.DataFrame.from_dict(rows, orient='index', columns=['price', 'prev_close', 'pct', 'session', 'updated_at'])
+
+    def since(self, ts):
+        """ts 이후 갱신된 시세 {ticker: 시세} (상태판 게시용)"""
+        with self.lock: return {t: dict(q) for t, q in self.quotes.items() if q['updated_at'] > ts}
+
+    def fetch(self, ticker, max_age=None):
+        """캐시에 없거나 오래된 종목(감시 목록 밖 등)만 단건 조회 후 캐시에 넣음"""
+        q = self.get(ticker, max_age)
+        if q is not None: return q
+        try:
+            with get_metrics().timer('yfinance.quote'):
+                fi = yf.Ticker(ticker).fast_info
+                price, prev = fi.last_price, fi.previous_close
+        except Exception: return self.get(ticker)
+        if price is None: return None
+        now = time.time()
+        q = {'price': price, 'prev_close': prev, 'pct': (price - prev) / prev * 100 if prev else float('nan'),
+             'session': session_day(now), 'updated_at': now}
+        with self.lock: self.quotes[ticker] = q
+        return dict(q)
+
+@singleton
+def get_quote_cache():
+    return QuoteCache()
+
+MOVE_ALERT_PCT = 3.0    # 전일 대비 이 이상 움직이면 알림
+MOVE_ALERT_STEP = 1.0   # 직전 알림 대비 이만큼 더 움직여야 다시 알림
+def move_alert(ticker, pct, price, session):
+    """급등락(3%) 판정 -> (본문, parse_mode) 또는 None
+
+    알림 상태('price')에 [시세의 거래일, 마지막 알림 변동률]을 남겨 같은 거래일 안에서만 히스테리시스 -
+    변동률은 전일 종가 대비라 새 거래일의 시세가 들어오면 처음부터 다시 판정한다. 휴장 중에도 직전 거래일
+    시세가 다시 게시되지만 거래일이 같으므로 재시작/주말/자정을 넘겨도 같은 움직임은 다시 알리지 않는다.
+    """
+    if pd.isna(pct) or abs(pct) < MOVE_ALERT_PCT: return None
+    day = session or session_day(time.time())
+    def step(last):
+        if isinstance(last, list) and last[0] == day and abs(pct - last[1]) < MOVE_ALERT_STEP: return last
+        return [day, float(pct)]
+    # 폴링 작업과 스트림 틱이 같은 종목을 동시에 판정해도 상태를 바꾼 쪽만 알림
+    last, new = get_alert_state().update('price', ticker, step)
+    if new == last: return None
+    write_log(f"🔔 급등락 알림 {pct:+.2f}%", ticker=ticker)
+    return (f"🔔 *[{ticker}] {'급등 🚀' if pct>0 else '급락 📉'}*\n변동: {pct:.2f}%\n현재: ${price:.2f}", "Markdown")
+
+def indicator_rules(snap):
+    """지표별 상태 전이 규칙: 이름 -> (옵션 키, {진입 상태: 조건}, 해제 조건, 교차형 여부)
+
+    레벨형은 해제 조건을 만족할 때까지 상태를 유지해(히스테리시스) 경계값 근처 반복 알림을 막고,
+    교차형은 방향이 바뀔 때만 알린다 (처음 관측한 방향은 기록만).
+    """
+    p = snap['price']
+    return {
+        'rsi': ('📉 RSI', {'OB': snap['rsi'] >= 70, 'OS': snap['rsi'] <= 30},
+                (snap['rsi'] > 35) & (snap['rsi'] < 65), False),
+        'volume': ('📊 거래량(2배)', {'SPIKE': snap['vol_ratio'] >= 2.0}, snap['vol_ratio'] < 1.5, False),
+        'high52': ('🚀 신고가', {'HIGH': p >= snap['high_52w']}, p < snap['high_52w'] * 0.98, False),
+        'ma': ('〰️ MA크로스', {'GOLDEN': snap['ma_fast'] > snap['ma_slow'], 'DEAD': snap['ma_fast'] < snap['ma_slow']}, None, True),
+        'bb': ('🛁 볼린저', {'UPPER': p > snap['bb_upper'], 'LOWER': p < snap['bb_lower']},
+               (p - snap['bb_mid']).abs() <= snap['bb_std'], False),
+        'macd': ('🌊 MACD', {'BULL': snap['macd'] > snap['macd_signal'], 'BEAR': snap['macd'] < snap['macd_signal']}, None, True),
+    }
+
+INDICATOR_OPTIONS = ['📉 RSI', '📊 거래량(2배)', '🚀 신고가', '〰️ MA크로스', '🛁 볼린저', '🌊 MACD']
+
+INDICATOR_MESSAGES = {
+    ('rsi', 'OB'): lambda t, r: f"🔥 [{t}] RSI 과매수 ({r['rsi']:.1f})",
+    ('rsi', 'OS'): lambda t, r: f"💧 [{t}] RSI 과매도 ({r['rsi']:.1f})",
+    ('volume', 'SPIKE'): lambda t, r: f"📊 [{t}] 거래량 급증 ({VOLUME_AVG_DAYS}일 평균 대비 {r['vol_ratio']:.1f}배)",
+    ('high52', 'HIGH'): lambda t, r: f"🚀 [{t}] 52주 신고가 (${r['price']:.2f} ≥ ${r['high_52w']:.2f})",
+    ('ma', 'GOLDEN'): lambda t, r: f"〰️ [{t}] 골든크로스 (MA{MA_FAST} ↗ MA{MA_SLOW})",
+    ('ma', 'DEAD'): lambda t, r: f"〰️ [{t}] 데드크로스 (MA{MA_FAST} ↘ MA{MA_SLOW})",
+    ('bb', 'UPPER'): lambda t, r: f"🛁 [{t}] 볼린저 상단 돌파 (${r['price']:.2f} > ${r['bb_upper']:.2f})",
+    ('bb', 'LOWER'): lambda t, r: f"🛁 [{t}] 볼린저 하단 이탈 (${r['price']:.2f} < ${r['bb_lower']:.2f})",
+    ('macd', 'BULL'): lambda t, r: f"🌊 [{t}] MACD 시그널 상향 돌파 ({r['macd']:.2f})",
+    ('macd', 'BEAR'): lambda t, r: f"🌊 [{t}] MACD 시그널 하향 돌파 ({r['macd']:.2f})",
+}
+
+def step_indicator_states(prev, enter, reset, cross):
+    """이전 상태 Series에 진입/해제 조건을 한 번에 적용한 새 상태 Series"""
+    new = prev.copy()
+    if not cross: new = new.fillna("NORMAL")
+    entered = pd.Series(False, index=prev.index)
+    for state, cond in enter.items():
+        cond = cond.reindex(prev.index).fillna(False).astype(bool)
+        new = new.mask(cond & ~entered, state)
+        entered |= cond
+    if reset is not None:
+        new = new.mask(reset.reindex(prev.index).fillna(False).astype(bool) & ~entered, "NORMAL")
+    return new
+
+def detect_indicator_alerts(snap, tickers):
+    """켜진 지표만 골라 상태 머신을 돌리고, 알림 대상 상태로 바뀐 종목의 (종목, 옵션, 본문, parse_mode) 목록을 반환"""
+    alerts = []
+    for name, (opt, enter, reset, cross) in indicator_rules(snap).items():
+        targets = [t for t in snap.index if tickers.get(t, {}).get(opt)]
+        if not targets: continue
+        ns = f"indicator:{name}"
+        prev = pd.Series(get_alert_state().get_many(ns, targets), dtype=object)
+        new = step_indicator_states(prev, enter, reset, cross)
+        # 저장된 상태와 바꿔 끼우면서 받은 실제 이전 상태로 판정 (같은 지표를 동시에 판정해도 한 번만 알림)
+        prev = pd.Series(get_alert_state().swap_many(ns, {t: v for t, v in new.items() if isinstance(v, str)}), dtype=object).reindex(new.index)
+        changed = new[(new != prev) & new.isin(list(enter))]
+        if cross: changed = changed[prev[changed.index].notna()]
+        for t in changed.index:
+            alerts.append((t, opt, INDICATOR_MESSAGES[(name, changed[t])](t, snap.loc[t]), None))
+            write_log(f"🔔 지표 알림 {name}:{changed[t]}", ticker=t)
+    return alerts
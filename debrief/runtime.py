@@ -0,0 +1,55 @@
+"""
+실행 환경 (프로젝트 설정, 프로세스 전역 인스턴스, secrets)
+
+패키지 전체가 Streamlit 없이 import 되어야 하므로(python -m debrief) st.cache_resource 대신 여기의 singleton을,
+secrets는 get_secrets를 쓴다 (Streamlit 안에서는 st.secrets, 밖에서는 secrets.toml). UI도 같은 프로세스 안이면 같은 인스턴스를 본다.
+"""
+import functools
+import os
+import sys
+import threading
+try: import tomllib
+except ImportError: import tomli as tomllib  # Python 3.10 이하
+
+# --- 프로젝트 설정 ---
+CONFIG_FILE = 'debrief_settings.json'
+LOG_FILE = 'debrief.log'
+CONFIG_FLUSH_INTERVAL = 5  # 설정 변경분 묶음 저장 간격(초)
+CONFIG_REFRESH_INTERVAL = 15  # 다른 프로세스(UI/리더의 명령어)가 바꾼 설정 반영 간격(초)
+MONITOR_INTERVAL = 60      # 감시 집계 로그 간격(초) - 감지기별 실행 주기는 JOB_CADENCE
+MONITOR_MODE = os.environ.get("DEBRIEF_MONITOR_MODE", "async")  # async | thread
+WORKER_MODE = os.environ.get("DEBRIEF_WORKER_MODE", "embedded")  # embedded(단독) | cluster(워커 분담에 참여) | off(UI만)
+QUOTE_MAX_AGE = 180        # 시세 캐시 허용 지연(초) 기본값 - 설정의 quote_max_age로 변경 가능
+# Streamlit과 같은 위치 (뒤의 프로젝트 폴더 파일이 우선)
+SECRETS_FILES = (os.path.join(os.path.expanduser('~'), '.streamlit', 'secrets.toml'), os.path.join('.streamlit', 'secrets.toml'))
+
+def singleton(fn):
+    """인자 조합별로 한 번만 만들어 프로세스 전역으로 공유 (st.cache_resource 대체)"""
+    lock = threading.RLock()
+    instances = {}
+
+    @functools.wraps(fn)
+    def get(*args):
+        with lock:
+            if args not in instances: instances[args] = fn(*args)
+            return instances[args]
+    get.clear = instances.clear
+    return get
+
+@singleton
+def get_secrets():
+    """secrets 내용 (없으면 빈 dict) - Streamlit 앱과 독립 워커가 같은 키를 씀
+
+    Streamlit으로 실행 중이면 st.secrets (secrets.files 설정이나 호스팅 환경이 주입한 값 포함),
+    아니면 Streamlit과 같은 위치의 secrets.toml을 직접 읽는다.
+    """
+    st = sys.modules.get('streamlit')  # UI가 이미 불러왔을 때만 - 헤드리스 워커는 streamlit을 import 하지 않음
+    if st is not None and st.runtime.exists():
+        try: return st.secrets.to_dict()
+        except FileNotFoundError: pass  # secrets 파일이 하나도 없음 -> 아래 파일 탐색(역시 빈 dict)
+    secrets = {}
+    for path in SECRETS_FILES:
+        try:
+            with open(path, 'rb') as f: secrets.update(tomllib.load(f))
+        except FileNotFoundError: pass
+    return secrets
@@ -0,0 +1,154 @@
+"""[2-4] 감시 스케줄러 (종목/감지기별 주기 + 미국 장 시간 인식)"""
+import asyncio
+import hashlib
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from .config import get_config_store
+from .runtime import QUOTE_MAX_AGE
+from .subscriptions import all_tickers
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_HOURS = {'pre': (4, 0), 'open': (9, 30), 'close': (16, 0), 'post': (20, 0)}
+# 감지기별 실행 간격(초) - 정규장 / 프리·애프터 / 휴장
+JOB_CADENCE = {
+    'price':      {'regular': 15,  'extended': 120, 'closed': 1800},
+    'indicators': {'regular': 300, 'extended': 900, 'closed': 3600},
+    'news':       {'regular': 120, 'extended': 300, 'closed': 600},
+    'sec':        {'regular': 600, 'extended': 900, 'closed': 1800},
+    'eco':        {'regular': 60,  'extended': 60,  'closed': 60},
+    'earnings':   {'regular': 600, 'extended': 600, 'closed': 600},
+}
+SCHED_TICK = 5        # 이 시간 안에 도래한 작업은 한 묶음으로 실행 (번역/발송 일괄 처리)
+SCHED_MAX_RPS = 5     # 감시 작업이 내보내는 초당 외부 요청 상한
+PRICE_RPS_SHARE = 0.5 # 그중 가격 배치가 쓸 수 있는 몫 (나머지는 뉴스/공시 피드)
+
+def easter_sunday(year):
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return datetime(year, month, (h + l - 7 * m + 33 * month + 19) % 32).date()
+
+def nth_weekday(year, month, weekday, n):
+    """n번째 요일 (n<0 이면 뒤에서부터)"""
+    if n > 0:
+        first = datetime(year, month, 1).date()
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (datetime(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)).date()
+    return last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+def us_market_holidays(year):
+    """NYSE 정규 휴장일 (주말에 걸리면 금/월 대체 휴장)"""
+    def observed(d):
+        return d - timedelta(days=1) if d.weekday() == 5 else d + timedelta(days=1) if d.weekday() == 6 else d
+    fixed = [datetime(year, 1, 1).date(), datetime(year, 6, 19).date(), datetime(year, 7, 4).date(), datetime(year, 12, 25).date()]
+    days = {d for d in map(observed, fixed) if d.year == year}  # 1/1이 토요일이면 전년 12/31은 개장
+    days |= {nth_weekday(year, 1, 0, 3), nth_weekday(year, 2, 0, 3), easter_sunday(year) - timedelta(days=2),
+             nth_weekday(year, 5, 0, -1), nth_weekday(year, 9, 0, 1), nth_weekday(year, 11, 3, 4)}
+    return days
+
+def market_session(now=None):
+    """'regular' | 'extended' (프리/애프터) | 'closed'"""
+    now = (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+    if now.weekday() >= 5 or now.date() in us_market_holidays(now.year): return 'closed'
+    hm = (now.hour, now.minute)
+    if MARKET_HOURS['open'] <= hm < MARKET_HOURS['close']: return 'regular'
+    if MARKET_HOURS['pre'] <= hm < MARKET_HOURS['post']: return 'extended'
+    return 'closed'
+
+def price_request_floor(n_tickers):
+    """가격 배치의 최소 간격(초). yf.download는 종목마다 요청을 1건씩(일봉+분봉이면 2건) 보내므로
+    종목이 많으면 JOB_CADENCE보다 늘려 가격 배치가 요청 한도의 PRICE_RPS_SHARE 이상을 쓰지 않게 함"""
+    return 2 * n_tickers / (SCHED_MAX_RPS * PRICE_RPS_SHARE)
+
+def effective_quote_max_age(cfg=None):
+    """설정의 허용 지연과 현재 가격 갱신 주기 중 긴 쪽 (휴장 중이거나 종목이 많으면 시세가 느리게 갱신되므로)"""
+    cfg = cfg or get_config_store().snapshot()
+    interval = max(JOB_CADENCE['price'][market_session()], price_request_floor(len(all_tickers(cfg))))
+    return max(cfg.get('quote_max_age', QUOTE_MAX_AGE), 2 * interval)
+
+class RateLimiter:
+    """토큰 버킷 - 동기 작업은 acquire, 이벤트 루프 안에서는 acquire_async"""
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = float(self.burst)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self, n):
+        # 토큰을 선점하고 기다려야 할 시간을 돌려줌 (음수 잔고 허용 -> 요청 순서대로 대기)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= n
+            return max(0.0, -self.tokens / self.rate)
+
+    def charge(self, n):
+        """이미 나간 요청 n건을 기다리지 않고 차감 (뒤이은 acquire가 그만큼 대기)"""
+        self._reserve(n)
+
+    def acquire(self, n=1):
+        wait = self._reserve(n)
+        if wait: time.sleep(wait)
+
+    async def acquire_async(self, n=1):
+        wait = self._reserve(n)
+        if wait: await asyncio.sleep(wait)
+
+class JobScheduler:
+    """(감지기, 종목) 작업을 다음 실행 시각 순으로 꺼내는 우선순위 큐.
+    종목 작업은 키 해시로 주기 안에 위상을 흩어 요청이 한 순간에 몰리지 않게 함"""
+    def __init__(self, cadence=JOB_CADENCE, clock=time.monotonic, session_fn=market_session):
+        self.cadence = cadence
+        self.clock = clock
+        self.session_fn = session_fn
+        self.session = session_fn()
+        self.heap = []       # (실행 시각, 순번, 키)
+        self.due = {}        # 키 -> 현재 유효한 실행 시각 (힙에 남은 옛 항목은 꺼낼 때 버림)
+        self.seq = 0
+        self.floor = {}      # 감지기 -> 최소 간격(초) (요청 한도에 맞춰 cadence보다 늘릴 때)
+
+    def interval(self, key):
+        return max(self.cadence[key[0]][self.session], self.floor.get(key[0], 0))
+
+    def phase(self, key):
+        if key[1] is None: return 0.0  # 배치 작업은 즉시 시작
+        return (int(hashlib.md5(f"{key[0]}:{key[1]}".encode()).hexdigest()[:8], 16) % 1000) / 1000 * self.interval(key)
+
+    def _push(self, key, at):
+        self.due[key] = at
+        self.seq += 1
+        heapq.heappush(self.heap, (at, self.seq, key))
+
+    def sync(self, keys):
+        """설정에서 뽑은 작업 목록과 맞춤. 장 상태가 바뀌면 새 주기로 전체 재배치"""
+        now = self.clock()
+        session = self.session_fn()
+        if session != self.session:
+            self.session = session
+            for key in list(self.due): self._push(key, now + self.phase(key))
+        for key in set(self.due) - set(keys): del self.due[key]
+        for key in set(keys) - set(self.due): self._push(key, now + self.phase(key))
+
+    def pop_due(self, window=SCHED_TICK):
+        """지금부터 window 안에 도래하는 작업을 모두 꺼내고 다음 회차를 예약"""
+        now = self.clock()
+        ready = []
+        while self.heap and self.heap[0][0] <= now + window:
+            at, _, key = heapq.heappop(self.heap)
+            if self.due.get(key) == at: ready.append((key, at))
+        for key, at in ready: self._push(key, max(at + self.interval(key), now))
+        return [key for key, _ in ready]
+
+    def wait_time(self, cap=SCHED_TICK):
+        if not self.heap: return cap
+        return min(cap, max(0.0, self.heap[0][0] - self.clock()))
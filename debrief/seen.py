@@ -0,0 +1,93 @@
+"""[2-3] 뉴스/공시 중복 제거 인덱스 (SQLite)"""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from .config import get_config_store
+from .runtime import singleton
+
+SEEN_DB_FILE = 'debrief_seen.db'
+SEEN_TTL = 14 * 86400        # 본 링크/제목을 기억하는 기간(초)
+SEEN_PURGE_INTERVAL = 3600
+SEEN_QUERY_CHUNK = 500       # 조회 한 번에 넣는 지문 수 (SQLite 변수 개수 한도)
+
+def news_fingerprints(item):
+    """링크와 정규화한 원문 제목의 지문. 다른 매체/종목으로 재배포된 같은 기사는 제목 지문으로 걸러짐"""
+    link = (item.get('link') or '').strip()
+    title = re.sub(r'[^0-9a-z가-힣]+', ' ', (item.get('raw_title') or '').lower()).strip()
+    fps = [f"l:{hashlib.sha1(link.encode()).hexdigest()}"]
+    if title: fps.append(f"t:{hashlib.sha1(title.encode()).hexdigest()}")
+    return fps
+
+def chat_fp(chat, fp):
+    """채팅방별 지문 - 같은 기사도 채팅방마다 따로 기록 (채팅방 없는 지문은 구버전 기록으로 모든 채팅방에 적용)"""
+    return f"{chat}|{fp}"
+
+class SeenStore:
+    """이미 알린 기사 지문을 기간 만료와 함께 보관 (기본키 조회라 항목 수와 무관하게 O(1))"""
+    def __init__(self, path=SEEN_DB_FILE, ttl=SEEN_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen (fp TEXT PRIMARY KEY, ticker TEXT, seen_at REAL)")
+        self.db.commit()
+        self.purged_at = 0
+
+    def seen(self, fps):
+        fps = list(fps)
+        if not fps: return set()
+        cutoff = time.time() - self.ttl
+        found = set()
+        with self.lock:
+            for k in range(0, len(fps), SEEN_QUERY_CHUNK):
+                part = fps[k:k + SEEN_QUERY_CHUNK]
+                found.update(r[0] for r in self.db.execute(
+                    f"SELECT fp FROM seen WHERE seen_at >= ? AND fp IN ({','.join('?' * len(part))})", [cutoff, *part]))
+        return found
+
+    def filter_new(self, fresh):
+        """{ticker: [(item, [채팅방])]} -> 같은 모양. 채팅방마다 이미 받은 기사와, 같은 사이클에 다른 종목으로 중복된 기사를
+        그 채팅방에서만 뺀다 (재배포 기사라도 종목마다 구독 채팅방이 다르면 채팅방별로는 처음일 수 있음). 받을 곳이 없으면 기사째 제외"""
+        fps = {id(i): news_fingerprints(i) for pairs in fresh.values() for i, _ in pairs}
+        chats = {c for pairs in fresh.values() for _, cs in pairs for c in cs}
+        known = self.seen([fp for v in fps.values() for fp in v] + [chat_fp(c, fp) for c in chats for v in fps.values() for fp in v])
+        out = {}
+        for t, pairs in fresh.items():
+            keep = []
+            for i, cs in pairs:
+                if known.intersection(fps[id(i)]): continue  # 채팅방 구분 전(구버전)에 기록된 기사
+                new = [c for c in cs if not known.intersection(chat_fp(c, fp) for fp in fps[id(i)])]
+                known.update(chat_fp(c, fp) for c in new for fp in fps[id(i)])
+                if new: keep.append((i, new))
+            out[t] = keep
+        return out
+
+    def mark(self, sent):
+        """{ticker: [(item, [채팅방])]} 알림 보낸 기사를 채팅방별로 한 트랜잭션에 기록"""
+        self._insert([(chat_fp(c, fp), t) for t, pairs in sent.items() for i, cs in pairs for c in cs for fp in news_fingerprints(i)])
+
+    def _insert(self, rows):
+        if not rows: return
+        now = time.time()
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO seen (fp, ticker, seen_at) VALUES (?, ?, ?)", [(fp, t, now) for fp, t in rows])
+            if now - self.purged_at > SEEN_PURGE_INTERVAL:
+                self.db.execute("DELETE FROM seen WHERE seen_at < ?", (now - self.ttl,))
+                self.purged_at = now
+            self.db.commit()
+
+    def import_links(self, history):
+        """구버전 config['news_history'] {ticker: [link]} 이관"""
+        self._insert([(fp, t) for t, links in history.items() for l in links for fp in news_fingerprints({'link': l})])
+
+@singleton
+def get_seen_store():
+    store = SeenStore()
+    # 설정에 남아 있던 링크 이력은 한 번 옮기고 설정에서 제거 (설정 저장 크기 축소)
+    legacy = get_config_store().get('news_history')
+    if legacy:
+        store.import_links(legacy)
+        get_config_store().update(lambda c: c.pop('news_history', None))
+    return store
@@ -0,0 +1,351 @@
+"""[2] 데이터 엔진 (뉴스/공시 피드, Finviz 스냅샷, 경제 일정)"""
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+import cloudscraper
+import lxml.html
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from .logs import write_log
+from .metrics import get_metrics
+from .net import get_http_session
+from .runtime import singleton
+from .state import get_alert_state
+from .translate import translate_texts
+
+FEED_FRESH_SECONDS = 120  # 봇 명령어는 이 시간 안에 받아 둔 피드면 캐시로 응답
+FEED_MAX_ITEMS = 3
+
+def parse_feed_items(content):
+    """RSS 본문에서 상위 항목만 (제목, 링크, 발행시각) 형태로 파싱"""
+    root = ET.fromstring(content)
+    items = []
+    for item in root.findall('.//item')[:FEED_MAX_ITEMS]:
+        try:
+            title = item.find('title').text.split(' - ')[0]
+            link = item.find('link').text
+            pubDate = item.find('pubDate').text
+            dt_obj = None
+            try: dt_obj = datetime.strptime(pubDate.replace(' GMT', ''), '%a, %d %b %Y %H:%M:%S')
+            except: pass
+            items.append({'raw_title': title, 'link': link, 'published': dt_obj})
+        except: continue
+    return items
+
+class FeedPoller:
+    """피드 URL별 ETag/Last-Modified를 기억해 조건부 요청을 보내고, 파싱 결과를 캐시"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.feeds = {}  # url -> {'etag', 'last_modified', 'digest', 'items', 'checked_at'}
+
+    def _lookup(self, url, max_age):
+        """(캐시 항목, 신선하면 캐시 결과 / 아니면 None)"""
+        with self.lock: entry = self.feeds.get(url)
+        if entry and max_age and time.time() - entry['checked_at'] < max_age:
+            return entry, entry['items']
+        return entry, None
+
+    @staticmethod
+    def _validators(entry):
+        headers = {}
+        if entry:
+            if entry.get('etag'): headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'): headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _store(self, url, entry, status, headers, content):
+        get_metrics().inc('feed_responses', status=status)
+        if status == 304 and entry:
+            entry['checked_at'] = time.time()
+            return entry['items']
+        if status != 200:
+            get_metrics().error('rss', f"HTTP {status}")
+            return entry['items'] if entry else []
+
+        # 검증 헤더를 주지 않는 서버 대비: 본문이 같으면 파싱 생략
+        digest = hashlib.sha1(content).hexdigest()
+        if entry and entry['digest'] == digest:
+            get_metrics().inc('feed_responses', status='unchanged')
+            items = entry['items']
+        else:
+            try: items = parse_feed_items(content)
+            except Exception as e:
+                get_metrics().error('rss.parse', e)
+                return entry['items'] if entry else []
+
+        with self.lock:
+            self.feeds[url] = {
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'digest': digest,
+                'items': items,
+                'checked_at': time.time(),
+            }
+        return items
+
+    def fetch(self, url, max_age=0):
+        entry, cached = self._lookup(url, max_age)
+        if cached is not None: return cached
+        try:
+            with get_metrics().timer('rss'):
+                resp = get_http_session().get(url, headers=self._validators(entry), timeout=3)
+        except Exception:
+            return entry['items'] if entry else []
+        return self._store(url, entry, resp.status_code, resp.headers, resp.content)
+
+    async def fetch_async(self, http, url, max_age=0):
+        entry, cached = self._lookup(url, max_age)
+        if cached is not None: return cached
+        try:
+            with get_metrics().timer('rss'):
+                status, headers, content = await http.request('GET', url, headers=self._validators(entry), timeout=3)
+        except Exception:
+            return entry['items'] if entry else []
+        return self._store(url, entry, status, headers, content)
+
+@singleton
+def get_feed_poller():
+    return FeedPoller()
+
+NEWS_FEED_BASE = os.environ.get("DEBRIEF_NEWS_BASE", "https://news.google.com")
+
+def news_feed_urls(ticker, is_sec_search=False):
+    if is_sec_search:
+        return [f"{NEWS_FEED_BASE}/rss/search?q={ticker}+SEC+Filing+OR+8-K+OR+10-Q+OR+10-K+when:2d&hl=en-US&gl=US&ceid=US:en"]
+    return [f"{NEWS_FEED_BASE}/rss/search?q={ticker}+stock+news+when:1d&hl=en-US&gl=US&ceid=US:en"]
+
+def shape_news_items(feed_results, is_sec_search=False):
+    """피드별 파싱 결과를 중복 링크/24시간 지난 항목을 걸러 알림용 항목으로 변환"""
+    collected_items = []
+    seen_links = set()
+    prefix = "🏛️" if is_sec_search else "📰"
+    for items in feed_results:
+        for item in items:
+            link = item['link']; dt_obj = item['published']
+            if link in seen_links: continue
+            seen_links.add(link)
+            if dt_obj and (datetime.utcnow() - dt_obj) > timedelta(hours=24): continue
+            date_str = dt_obj.strftime('%m/%d %H:%M') if dt_obj else "Recent"
+            collected_items.append({'title': f"{prefix} {item['raw_title']}", 'raw_title': item['raw_title'], 'link': link, 'date': date_str, 'prefix': prefix})
+    return collected_items
+
+def get_integrated_news(ticker, is_sec_search=False, translate=True, max_age=0):
+    poller = get_feed_poller()
+    feeds = [poller.fetch(url, max_age=max_age) for url in news_feed_urls(ticker, is_sec_search)]
+    collected_items = shape_news_items(feeds, is_sec_search)
+    if translate: localize_news(collected_items)
+    return collected_items
+
+async def get_integrated_news_async(http, ticker, is_sec_search=False, max_age=0):
+    """비동기 모니터용 (번역 없음 - 사이클 단위로 localize_news 일괄 처리)"""
+    poller = get_feed_poller()
+    feeds = await asyncio.gather(*(poller.fetch_async(http, url, max_age=max_age) for url in news_feed_urls(ticker, is_sec_search)))
+    return shape_news_items(feeds, is_sec_search)
+
+def localize_news(items):
+    """뉴스 제목을 캐시 경유 일괄 번역으로 한글화 (여러 종목의 항목을 한 번에 넘기면 요청도 한 번)"""
+    if not items: return items
+    for item, title_ko in zip(items, translate_texts([i['raw_title'][:150] for i in items])):
+        item['title'] = f"{item['prefix']} {title_ko}"
+    return items
+
+class TTLCache:
+    """키별 TTL 캐시. 같은 키를 동시에 요청하면 한 번만 불러오고 나머지는 그 결과를 공유(single-flight)"""
+    def __init__(self, ttl, maxsize=512):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (만료시각, 값)
+        self.inflight = {}            # key -> Future
+
+    def get(self, key):
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit and hit[0] > time.time(): return hit[1]
+        return None
+
+    def get_or_load(self, key, loader):
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit and hit[0] > time.time(): return hit[1]
+            fut = self.inflight.get(key)
+            owner = fut is None
+            if owner: fut = self.inflight[key] = Future()
+        if not owner: return fut.result()
+
+        try:
+            value = loader()
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self.lock: self.inflight.pop(key, None)
+        if value:  # 실패(빈 결과)는 캐시하지 않음
+            with self.lock:
+                self.entries[key] = (time.time() + self.ttl, value)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.maxsize: self.entries.popitem(last=False)
+        fut.set_result(value)
+        return value
+
+FINVIZ_TTL = 600  # Finviz 스냅샷 캐시 유지 시간(초)
+
+@singleton
+def get_finviz_scraper():
+    """Cloudflare 챌린지를 한 번 통과한 세션을 계속 재사용"""
+    return {'scraper': cloudscraper.create_scraper(), 'lock': threading.Lock()}
+
+@singleton
+def get_finviz_cache():
+    return TTLCache(FINVIZ_TTL)
+
+def parse_finviz_snapshot(text):
+    """페이지 전체가 아니라 snapshot 표 구간만 잘라 lxml로 파싱 -> {항목: 값}"""
+    pos = text.find('snapshot-table2')
+    if pos < 0: return {}
+    start = text.rfind('<table', 0, pos)
+    end = text.find('</table>', pos)
+    if start < 0 or end < 0: return {}
+    table = lxml.html.fromstring(text[start:end + len('</table>')])
+    cells = [td.text_content().strip() for td in table.iter('td')]
+    return {k: v for k, v in zip(cells[0::2], cells[1::2]) if k}
+
+def parse_finviz_tables(text):
+    """구형 방식 (snapshot 표를 못 찾을 때만): 모든 표를 읽어 재무 표를 찾음"""
+    data = {}
+    for df in pd.read_html(io.StringIO(text)):
+        flat = df.to_string()
+        if 'P/E' in flat or 'Market Cap' in flat:
+            if len(df.columns) > 1:
+                for i in range(0, len(df.columns), 2):
+                    try:
+                        keys = df.iloc[:, i]; values = df.iloc[:, i+1]
+                        for k, v in zip(keys, values): data[str(k)] = str(v)
+                    except: pass
+    return data
+
+FINVIZ_BASE = os.environ.get("DEBRIEF_FINVIZ_BASE", "https://finviz.com")
+
+def fetch_finviz_data(ticker):
+    url = f"{FINVIZ_BASE}/quote.ashx?t={ticker}"
+    holder = get_finviz_scraper()
+    text = None
+    with get_metrics().timer('finviz'):
+        try:
+            resp = holder['scraper'].get(url, timeout=5)
+            if resp.status_code in (403, 503):
+                # 챌린지 만료 -> 세션 재생성 후 한 번 더
+                get_metrics().inc('finviz_challenge')
+                with holder['lock']: holder['scraper'] = cloudscraper.create_scraper()
+                resp = holder['scraper'].get(url, timeout=5)
+            text = resp.text
+        except Exception as e:
+            get_metrics().error('finviz.scraper', e)
+            resp = get_http_session().get(url, timeout=5)
+            text = resp.text
+        return parse_finviz_snapshot(text) or parse_finviz_tables(text)
+
+def get_finviz_data(ticker):
+    try: return get_finviz_cache().get_or_load(ticker, lambda: fetch_finviz_data(ticker))
+    except Exception: return {}  # 오류는 fetch_finviz_data의 계측에서 집계
+
+ECO_CALENDAR_URL = os.environ.get("DEBRIEF_ECO_URL", "https://nfs.faireconomy.media/ff_calendar_thisweek.xml")
+ECO_FEED_TZ = timezone.utc              # 피드의 date/time 기준 시간대 (GMT)
+ECO_REFRESH_INTERVAL = 6 * 3600         # 주간 일정 정기 갱신 간격(초)
+ECO_WATCH_WINDOW = (timedelta(minutes=-2), timedelta(minutes=30))  # 발표 시각 기준 감시 구간
+ECO_WATCH_INTERVAL = 150                # 감시 구간 안에서의 재조회 간격(초)
+ECO_RETRY_DELAY = 600                   # 피드 조회 실패 후 재시도까지 대기(초)
+
+def parse_economic_feed(content):
+    root = ET.fromstring(content)
+    nodes = [e for e in root.findall('event')
+             if e.find('country').text == 'USD' and e.find('impact').text in ['High', 'Medium']]
+    titles = translate_texts([e.find('title').text for e in nodes])
+    events = []
+    for event, title in zip(nodes, titles):
+        date = event.find('date').text; t = event.find('time').text
+        release_at = None
+        try: release_at = datetime.strptime(f"{date} {t}", "%m-%d-%Y %I:%M%p").replace(tzinfo=ECO_FEED_TZ)
+        except: pass  # All Day / Tentative 등
+        try: day = datetime.strptime(date, "%m-%d-%Y").strftime('%Y-%m-%d')
+        except: day = date
+        actual = event.find('actual')
+        events.append({
+            'date': date,
+            'day': day,
+            'time': t,
+            'release_at': release_at,
+            'event': title,
+            'impact': event.find('impact').text,
+            'forecast': event.find('forecast').text or "",
+            'previous': event.find('previous').text or "",
+            'actual': (actual.text or "") if actual is not None else "",
+            'id': f"{date}_{t}_{event.find('title').text}"
+        })
+    events.sort(key=lambda x: (x['day'], x['release_at'] or datetime.max.replace(tzinfo=ECO_FEED_TZ)))
+    return events
+
+class EconomicCalendar:
+    """주간 경제 일정 캐시. 정기 갱신 사이에는 발표 시각 근처에서만 피드를 다시 읽어 실제치를 확인"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.scraper = cloudscraper.create_scraper()
+        self.events = []
+        self.fetched_at = 0
+        self.retry_at = 0
+        self.week = None
+
+    def _refresh(self):
+        with get_metrics().timer('eco.feed'): resp = self.scraper.get(ECO_CALENDAR_URL, timeout=10)
+        if resp.status_code != 200:
+            get_metrics().error('eco.feed', f"HTTP {resp.status_code}")
+            return False
+        events = parse_economic_feed(resp.content)
+        with self.lock:
+            self.events = events
+            self.fetched_at = time.time()
+            self.week = datetime.now().isocalendar()[:2]
+        return True
+
+    def get_events(self):
+        due = (time.time() - self.fetched_at > ECO_REFRESH_INTERVAL
+               or self.week != datetime.now().isocalendar()[:2])
+        if due and time.time() >= self.retry_at:
+            try: ok = self._refresh()
+            except Exception as e:
+                write_log(f"Eco Refresh Err: {e}")
+                ok = False
+            if not ok: self.retry_at = time.time() + ECO_RETRY_DELAY  # 실패 시 매 사이클 재시도하지 않음
+        with self.lock: return [dict(e) for e in self.events]
+
+    def watch(self):
+        """발표 구간에 든 일정이 있을 때만 재조회하고, 실제치가 새로 나온 일정(알림 상태 'eco'로 중복 제거)을 반환"""
+        now = datetime.now(timezone.utc)
+        in_window = lambda e: e['release_at'] and e['release_at'] + ECO_WATCH_WINDOW[0] <= now <= e['release_at'] + ECO_WATCH_WINDOW[1]
+        waiting = [e for e in self.get_events() if in_window(e) and not e['actual']]
+        with self.lock: recent = time.time() - self.fetched_at < ECO_WATCH_INTERVAL
+        if not waiting or recent: return []
+        try: self._refresh()
+        except Exception as e:
+            write_log(f"Eco Watch Err: {e}")
+            return []
+        released = []
+        state = get_alert_state()
+        for e in self.get_events():
+            if in_window(e) and e['actual'] and state.update('eco', e['id'], lambda seen: True)[0] is None:
+                released.append(e)
+        return released
+
+@singleton
+def get_economic_calendar():
+    return EconomicCalendar()
+
+def get_economic_events():
+    with get_metrics().guard('eco.events'): return get_economic_calendar().get_events()
+    return []
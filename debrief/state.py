@@ -0,0 +1,114 @@
+"""
+감지기 알림 상태 (프로세스 전역 + SQLite 보존)
+
+급등락 히스테리시스, 지표 상태 머신, 경제 지표 발표/실적 발표 전일 알림의 '이미 알렸는지' 기록.
+예전에는 st.session_state(메모리)에만 있어서 재시작할 때마다 이미 3%를 넘었거나 과매수 상태인
+종목이 한꺼번에 다시 알렸다. 읽기/갱신은 메모리에서 하고 디스크에는 바뀐 키만 모아서 쓴다.
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from .metrics import get_metrics
+from .runtime import singleton
+
+ALERT_STATE_DB_FILE = 'debrief_alert_state.db'
+ALERT_STATE_FLUSH_INTERVAL = 2          # 변경분 디스크 반영 간격(초) - 알림 경로는 디스크를 기다리지 않음
+ALERT_STATE_TTL = {'eco': 14 * 86400, 'price': 4 * 86400}   # 이름공간별 보관 기간(초) - 지정하지 않은 이름공간은 계속 보관
+ALERT_STATE_PURGE_INTERVAL = 3600
+
+class AlertState:
+    """(이름공간, 키) -> 값 저장소. 이름공간은 'price', 'eco', 'earnings', 'indicator:<지표>' 이고 키는 종목/일정 id
+
+    키 단위 갱신(update/swap_many)은 lock 하나 안에서 읽고 바꾸므로 감시 작업 스레드와 스트림 틱이
+    동시에 같은 종목을 판정해도 한 쪽만 알린다. 바뀐 키는 dirty에 모였다가 flush 때 한 트랜잭션으로 기록된다.
+    """
+    def __init__(self, path=ALERT_STATE_DB_FILE, flush_interval=ALERT_STATE_FLUSH_INTERVAL):
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS alert_state (ns TEXT, key TEXT, value TEXT, updated_at REAL, "
+                        "PRIMARY KEY (ns, key)) WITHOUT ROWID")
+        self.db.commit()
+        self.values = {}   # (ns, key) -> 값
+        self.dirty = {}    # (ns, key) -> (값 또는 None=삭제, 변경 시각)
+        self.purged_at = 0
+        self.reload()
+        threading.Thread(target=self._flush_loop, daemon=True, name="DeBrief_AlertState").start()
+
+    def reload(self):
+        """디스크 기준으로 메모리를 다시 채움 (분담 워커의 종목 재분배 후 - 다른 워커가 알린 상태 인수)"""
+        self.flush()
+        with self.db_lock: rows = self.db.execute("SELECT ns, key, value FROM alert_state").fetchall()
+        with self.lock:
+            self.values = {(ns, key): json.loads(value) for ns, key, value in rows}
+            for k, (value, _) in self.dirty.items():  # reload 도중 바뀐 키는 메모리 쪽이 최신
+                if value is None: self.values.pop(k, None)
+                else: self.values[k] = value
+
+    # --- 읽기/갱신 ---
+    def get(self, ns, key, default=None):
+        with self.lock: return self.values.get((ns, key), default)
+
+    def get_many(self, ns, keys):
+        with self.lock: return {k: self.values.get((ns, k)) for k in keys}
+
+    def _set(self, k, value, now):
+        if value is None: self.values.pop(k, None)
+        else: self.values[k] = value
+        self.dirty[k] = (value, now)
+
+    def update(self, ns, key, fn):
+        """fn(이전 값 또는 None) -> 새 값(None이면 삭제)을 원자적으로 적용하고 (이전 값, 새 값) 반환"""
+        now = time.time()
+        with self.lock:
+            old = self.values.get((ns, key))
+            new = fn(old)
+            if new != old: self._set((ns, key), new, now)
+        return old, new
+
+    def swap_many(self, ns, values):
+        """{키: 새 값}을 한 번에 반영하고 {키: 이전 값} 반환 (이전 값과 비교해 실제로 바꾼 쪽만 알리도록)"""
+        now = time.time()
+        with self.lock:
+            old = {k: self.values.get((ns, k)) for k in values}
+            for k, v in values.items():
+                if v != old[k]: self._set((ns, k), v, now)
+        return old
+
+    # --- 디스크 반영 ---
+    def flush(self):
+        with self.lock:
+            if not self.dirty: return
+            dirty, self.dirty = self.dirty, {}
+        upserts = [(ns, key, json.dumps(value), at) for (ns, key), (value, at) in dirty.items() if value is not None]
+        deletes = [(ns, key) for (ns, key), (value, _) in dirty.items() if value is None]
+        try:
+            with self.db_lock:
+                self.db.executemany("INSERT OR REPLACE INTO alert_state (ns, key, value, updated_at) VALUES (?, ?, ?, ?)", upserts)
+                self.db.executemany("DELETE FROM alert_state WHERE ns = ? AND key = ?", deletes)
+                now = time.time()
+                if now - self.purged_at > ALERT_STATE_PURGE_INTERVAL:
+                    for ns, ttl in ALERT_STATE_TTL.items():
+                        self.db.execute("DELETE FROM alert_state WHERE ns = ? AND updated_at < ?", (ns, now - ttl))
+                    self.purged_at = now
+                self.db.commit()
+        except Exception:
+            with self.lock:  # 실패한 변경분은 다음 flush에서 다시 (그 사이 더 새로 바뀐 키는 그대로)
+                for k, v in dirty.items(): self.dirty.setdefault(k, v)
+            raise
+        get_metrics().inc('alert_state_writes', len(dirty))
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with get_metrics().guard('alert_state.flush'): self.flush()
+
+@singleton
+def get_alert_state():
+    state = AlertState()
+    atexit.register(state.flush)
+    return state
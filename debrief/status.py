@@ -0,0 +1,99 @@
+"""[3-3] 워커 상태판 (시세 캐시/계측/발신 큐를 SQLite로 게시 -> 별도 프로세스의 UI가 읽음)
+
+DEBRIEF_WORKER_MODE=off 로 띄운 UI는 워커와 프로세스가 달라 시세 캐시·계측 같은 프로세스 전역 인스턴스가
+비어 있다. 워커가 몇 초마다 여기에 써 두고, UI는 QuoteCache.frame / Metrics.summary 와 같은 모양으로 읽는다.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import pandas as pd
+from .metrics import get_metrics
+from .outbox import get_telegram_outbox
+from .prices import get_quote_cache
+from .runtime import singleton
+
+STATUS_DB_FILE = 'debrief_status.db'
+STATUS_PUBLISH_INTERVAL = 5     # 워커의 게시 간격(초)
+STATUS_STALE = 60               # 이 시간 넘게 게시가 없던 워커는 UI 집계에서 제외
+STATUS_QUOTE_TTL = 86400        # 목록에서 빠진 종목 시세 행 보관 기간(초)
+
+class StatusBoard:
+    """워커별 상태(계측 요약/오류/발신 큐)와 종목별 최신 시세. 분담 워커들이 같은 파일에 쓰면 UI는 합쳐서 보여 줌"""
+    def __init__(self, path=STATUS_DB_FILE):
+        self.lock = threading.Lock()
+        self.published_at = 0
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS quotes (ticker TEXT PRIMARY KEY, price REAL, prev_close REAL, pct REAL, "
+                        "updated_at REAL) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, status TEXT, updated_at REAL) WITHOUT ROWID")
+        self.db.commit()
+
+    # --- 워커 쪽 ---
+    def publish(self, worker_id):
+        """지난 게시 이후 바뀐 시세와 이 워커의 계측/발신 큐 상태를 한 트랜잭션으로"""
+        now = time.time()
+        quotes = get_quote_cache().since(self.published_at)
+        status = {'summary': get_metrics().summary(), 'errors': get_metrics().error_summary(), 'outbox': get_telegram_outbox().stats()}
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO quotes VALUES (?, ?, ?, ?, ?)",
+                                [(t, q['price'], q['prev_close'], q['pct'], q['updated_at']) for t, q in quotes.items()])
+            self.db.execute("INSERT OR REPLACE INTO workers VALUES (?, ?, ?)", (worker_id, json.dumps(status), now))
+            self.db.execute("DELETE FROM quotes WHERE updated_at < ?", (now - STATUS_QUOTE_TTL,))
+            self.db.commit()
+        self.published_at = now
+
+    # --- UI 쪽 (QuoteCache / Metrics 와 같은 모양) ---
+    def frame(self, tickers, max_age=None):
+        tickers = list(tickers)
+        if not tickers: return pd.DataFrame(columns=['price', 'prev_close', 'pct', 'updated_at'])
+        cutoff = time.time() - max_age if max_age is not None else 0
+        with self.lock:
+            rows = self.db.execute(f"SELECT ticker, price, prev_close, pct, updated_at FROM quotes WHERE updated_at >= ? "
+                                   f"AND ticker IN ({','.join('?' * len(tickers))})", [cutoff, *tickers]).fetchall()
+        return pd.DataFrame([r[1:] for r in rows], index=[r[0] for r in rows], columns=['price', 'prev_close', 'pct', 'updated_at'])
+
+    def workers(self, stale=STATUS_STALE):
+        """최근에 게시한 워커 {id: 상태}"""
+        with self.lock:
+            rows = self.db.execute("SELECT worker, status FROM workers WHERE updated_at >= ?", (time.time() - stale,)).fetchall()
+        return {w: json.loads(s) for w, s in rows}
+
+    def summary(self):
+        """워커들의 단계별 요약을 합침 (호출/오류 수는 합, 평균은 호출 수 가중, 분위수는 가장 느린 워커 기준)"""
+        merged = {}
+        for status in self.workers().values():
+            for r in status['summary']:
+                m = merged.setdefault(r['stage'], {'stage': r['stage'], 'calls': 0, 'errors': 0, 'total': 0.0, 'p50': 0.0, 'p95': 0.0})
+                m['calls'] += r['calls']; m['errors'] += r['errors']; m['total'] += r['avg'] * r['calls']
+                m['p50'] = max(m['p50'], r['p50']); m['p95'] = max(m['p95'], r['p95'])
+        rows = [{'stage': m['stage'], 'calls': m['calls'], 'errors': m['errors'], 'avg': m['total'] / m['calls'] if m['calls'] else 0.0,
+                 'p50': m['p50'], 'p95': m['p95']} for m in merged.values()]
+        return sorted(rows, key=lambda r: -r['calls'])
+
+    def error_summary(self):
+        counts = {}
+        for status in self.workers().values():
+            for stage, kind, n in status['errors']: counts[(stage, kind)] = counts.get((stage, kind), 0) + n
+        return sorted(((s, t, n) for (s, t), n in counts.items()), key=lambda r: -r[2])
+
+    def outbox_stats(self):
+        stats = [s['outbox'] for s in self.workers().values()]
+        return {'depth': sum(s['depth'] for s in stats), 'latency_p95': max((s['latency_p95'] for s in stats), default=0.0)}
+
+@singleton
+def get_status_board():
+    return StatusBoard()
+
+@singleton
+def start_status_publisher(worker_id=None):
+    """워커 프로세스에서 상태판 게시 스레드를 한 번만 띄움"""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    def loop():
+        while True:
+            with get_metrics().guard('status.publish'): get_status_board().publish(worker_id)
+            time.sleep(STATUS_PUBLISH_INTERVAL)
+    threading.Thread(target=loop, daemon=True, name="DeBrief_Status").start()
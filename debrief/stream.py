@@ -0,0 +1,97 @@
+"""[2-5] 실시간 시세 스트림 (선택 - 설정의 quote_stream)"""
+import asyncio
+import base64
+import json
+import os
+import time
+from .logs import write_log
+from .metrics import get_metrics
+from .prices import STREAM_STALE, get_quote_cache, session_day
+try:
+    from websockets.asyncio.client import connect as ws_connect
+    from yfinance.pricing_pb2 import PricingData
+except ImportError: ws_connect = PricingData = None  # 없으면 실시간 스트림 없이 폴링만
+
+STREAM_URL = os.environ.get("DEBRIEF_STREAM_URL", "wss://streamer.finance.yahoo.com/?version=2")
+STREAM_RECORD_FILE = os.environ.get("DEBRIEF_STREAM_RECORD")  # 지정하면 받은 원본 메시지를 JSON lines로 기록 (재생 서버용)
+STREAM_RESUBSCRIBE = 15      # 구독 재전송(하트비트) 간격(초)
+STREAM_RECONNECT_MAX = 60    # 재접속 대기 상한(초)
+
+def decode_stream_message(raw):
+    """야후 스트리머 메시지(JSON 안의 base64 protobuf) -> {'id', 'price', 'prev_close', 'pct', 'time'}"""
+    try:
+        data = PricingData()
+        data.ParseFromString(base64.b64decode(json.loads(raw)['message']))
+    except Exception: return None
+    if not data.id or not data.price: return None
+    prev = data.previous_close or (data.price - data.change if data.change else None)
+    pct = data.change_percent if data.change_percent or not prev else (data.price - prev) / prev * 100
+    return {'id': data.id, 'price': data.price, 'prev_close': prev, 'pct': pct,
+            'time': data.time / 1000 if data.time else time.time()}
+
+class QuoteStream:
+    """웹소켓으로 받은 체결가를 실시간 최종가 표 + 시세 캐시에 반영하고 틱마다 on_tick 호출.
+    끊기면 지수 백오프로 재접속하고, 그동안 해당 종목은 폴링이 다시 담당"""
+    def __init__(self, url=STREAM_URL, on_tick=None, record=STREAM_RECORD_FILE):
+        self.url = url
+        self.on_tick = on_tick
+        self.record = record
+        self.want = frozenset()       # 구독해야 할 종목 (모니터가 설정에서 갱신)
+        self.subscribed = frozenset()
+        self.last = {}                # ticker -> 최신 틱 (수신 시각 'received' 포함)
+        self.connected = False
+        self.ticks = 0
+
+    def configure(self, symbols):
+        self.want = frozenset(symbols)
+
+    def is_live(self, ticker, max_age=STREAM_STALE):
+        tick = self.last.get(ticker)
+        return self.connected and tick is not None and time.time() - tick['received'] < max_age
+
+    def handle(self, raw):
+        tick = decode_stream_message(raw)
+        if tick is None: return
+        now = time.time()
+        if self.record:
+            with open(self.record, 'a', encoding='utf-8') as f: f.write(json.dumps({'t': now, 'raw': raw}) + "\n")
+        self.last[tick['id']] = dict(tick, received=now)
+        self.ticks += 1
+        get_metrics().inc('stream_ticks')
+        session = session_day(tick['time'])  # 수신 시각이 아니라 체결 시각의 거래일
+        get_quote_cache().tick(tick['id'], tick['price'], tick['prev_close'], tick['pct'], now, session)
+        if self.on_tick: self.on_tick(tick['id'], tick['price'], tick['pct'], session)
+
+    async def run(self):
+        delay = 1
+        while True:
+            if not self.want:
+                await asyncio.sleep(1); continue
+            try:
+                async with ws_connect(self.url, open_timeout=10) as ws:
+                    self.connected = True; delay = 1
+                    write_log(f"📡 시세 스트림 연결 ({len(self.want)}종목)")
+                    await self._pump(ws)
+                    self.connected = False
+                    continue
+            except Exception as e:
+                get_metrics().error('stream', e)
+                write_log(f"Stream Err: {e}")
+            self.connected = False; self.subscribed = frozenset()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STREAM_RECONNECT_MAX)
+
+    async def _pump(self, ws):
+        self.subscribed = frozenset(); sent_at = 0
+        while self.want:
+            now = time.monotonic()
+            if self.want != self.subscribed or now - sent_at >= STREAM_RESUBSCRIBE:
+                want = self.want
+                gone = self.subscribed - want
+                if gone: await ws.send(json.dumps({"unsubscribe": sorted(gone)}))
+                await ws.send(json.dumps({"subscribe": sorted(want)}))
+                self.subscribed = want; sent_at = now
+            try: raw = await asyncio.wait_for(ws.recv(), timeout=1)
+            except asyncio.TimeoutError: continue
+            self.handle(raw)
+        self.subscribed = frozenset()
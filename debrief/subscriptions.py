@@ -0,0 +1,76 @@
+"""[2-6] 구독 (채팅방별 감시 목록 -> 종목 단위로 한 번 수집/판정 -> 채팅방별 발송)"""
+import re
+from .config import DEFAULT_OPTS
+
+MOVE_OPTION = '📈 급등락(3%)'
+EARNINGS_OPTION = '🟢 감시'  # 실적 발표 전일 알림은 감시를 켠 종목에
+
+def chat_watchlists(cfg, active_only=True):
+    """채팅방 -> {종목: 옵션}. 주 채팅방은 telegram.chat_id + tickers, 추가 채팅방은 chats"""
+    main = str(cfg['telegram'].get('chat_id') or '')
+    lists = {chat: sub.get('tickers', {}) for chat, sub in cfg.get('chats', {}).items() if chat != main}
+    lists[main] = cfg['tickers']
+    if not active_only: return lists
+    return {chat: {t: s for t, s in tickers.items() if s.get('🟢 감시', True)} for chat, tickers in lists.items()}
+
+def all_tickers(cfg):
+    """어느 채팅방에든 들어 있는 종목 (시세 배치/스트림 구독 대상)"""
+    return sorted({t for tickers in chat_watchlists(cfg, active_only=False).values() for t in tickers})
+
+def merge_watchlists(watchlists):
+    """종목별로 채팅방들의 옵션을 OR -> 수집/판정은 구독자 수와 무관하게 종목당 한 번"""
+    merged = {}
+    for tickers in watchlists.values():
+        for t, settings in tickers.items():
+            opts = merged.setdefault(t, {})
+            for k, v in settings.items(): opts[k] = opts.get(k) or v
+    return merged
+
+def eco_chats(cfg):
+    """경제 일정/발표 알림을 받을 채팅방"""
+    main = str(cfg['telegram'].get('chat_id') or '')
+    chats = [main] if main and cfg.get('eco_mode', True) else []
+    return chats + [c for c, sub in cfg.get('chats', {}).items() if c != main and sub.get('eco_mode', True)]
+
+def fan_out(alerts, watchlists):
+    """(종목, 옵션, 본문, parse_mode[, 채팅방 목록]) 알림 -> {채팅방: [(본문, parse_mode)]}.
+    그 종목의 해당 옵션을 켠 채팅방에만, 채팅방 목록이 붙은 알림(채팅방별 중복 제거한 뉴스)은 그중에서도 목록 안에만"""
+    subscribers = {}
+    for chat, tickers in watchlists.items():
+        for t, settings in tickers.items(): subscribers.setdefault(t, []).append((chat, settings))
+    out = {}
+    for ticker, opt, text, parse_mode, *only in alerts:
+        for chat, settings in subscribers.get(ticker, ()):
+            if settings.get(opt) and (not only or chat in only[0]): out.setdefault(chat, []).append((text, parse_mode))
+    return out
+
+def chat_watchlist(cfg, chat_id):
+    """명령어가 들어온 채팅방의 감시 목록 (cfg 안의 dict 그대로). 구독 등록 안 한 채팅방은 주 목록"""
+    sub = cfg.get('chats', {}).get(str(chat_id))
+    return sub['tickers'] if sub is not None else cfg['tickers']
+
+def watchlist_path(chat=''):
+    """감시 목록의 설정 경로 (패치 연산용). 주 채팅방은 tickers, 추가 채팅방은 chats[chat_id].tickers"""
+    return ('chats', str(chat), 'tickers') if chat else ('tickers',)
+
+TICKER_PATTERN = re.compile(r"[A-Z0-9^][A-Z0-9.\-=^]{0,19}")  # AAPL, BRK.B, BTC-USD, ^GSPC, 005930.KS
+TICKER_HEADERS = {'SYMBOL', 'SYMBOLS', 'TICKER', 'TICKERS'}
+
+def parse_tickers(text, first_column=False):
+    """붙여넣은 목록/파일 -> 중복 없는 대문자 티커 (입력 순서). first_column이면 CSV처럼 줄마다 첫 칸만"""
+    out = {}
+    for line in text.upper().splitlines():
+        cells = line.split(',')[:1] if first_column else re.split(r"[\s,;|]+", line)
+        for cell in cells:
+            cell = cell.strip().strip('"\'')
+            if cell in TICKER_HEADERS or not TICKER_PATTERN.fullmatch(cell) or not re.search(r"[A-Z]", cell): continue
+            out[cell] = True
+    return list(out)
+
+OPTION_ALIASES = {'watch': '🟢 감시', 'news': '📰 뉴스', 'move': '📈 급등락(3%)', 'price': '📈 급등락(3%)', 'volume': '📊 거래량(2배)',
+                  'high': '🚀 신고가', '52w': '🚀 신고가', 'bb': '🛁 볼린저', 'bollinger': '🛁 볼린저'}
+
+def match_option(word):
+    """'rsi', '뉴스', 'news'처럼 아이콘 없이 쓴 옵션 이름 -> DEFAULT_OPTS 키"""
+    word = word.lower()
+    return OPTION_ALIASES.get(word) or next((k for k in DEFAULT_OPTS if word in k.lower()), None)
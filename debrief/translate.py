@@ -0,0 +1,105 @@
+"""[2-2] 번역 캐시 (LRU + 디스크 보존, 일괄 번역)"""
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+from deep_translator import GoogleTranslator
+from .logs import write_log
+from .metrics import get_metrics
+from .runtime import singleton
+
+TRANSLATION_CACHE_FILE = 'debrief_translations.json'
+TRANSLATION_CACHE_SIZE = 5000   # 최대 보관 문장 수 (초과 시 오래 안 쓴 것부터 제거)
+TRANSLATION_CHUNK_CHARS = 1500  # 한 번의 번역 요청에 묶을 최대 글자 수
+TRANSLATION_SEP = "\n"
+
+class TranslationCache:
+    """(원문, 대상 언어) -> 번역문 LRU 캐시. 재시작해도 유지되도록 파일에 보존"""
+    def __init__(self, path=TRANSLATION_CACHE_FILE, maxsize=TRANSLATION_CACHE_SIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.dirty = False
+        if os.path.exists(path):
+            with get_metrics().guard('translation_cache.load'):
+                with open(path, 'r', encoding='utf-8') as f:
+                    for key, value in json.load(f): self.entries[key] = value
+
+    @staticmethod
+    def key(text, target):
+        return f"{target}\x00{text}"
+
+    def get(self, text, target):
+        k = self.key(text, target)
+        with self.lock:
+            if k not in self.entries: return None
+            self.entries.move_to_end(k)
+            return self.entries[k]
+
+    def put_many(self, pairs, target):
+        with self.lock:
+            for text, translated in pairs:
+                k = self.key(text, target)
+                self.entries[k] = translated
+                self.entries.move_to_end(k)
+            while len(self.entries) > self.maxsize: self.entries.popitem(last=False)
+            self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty: return
+            data = list(self.entries.items())
+            self.dirty = False
+        with get_metrics().guard('translation_cache.save'):
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.path)
+
+def translate_batch(texts, target='ko'):
+    """여러 문장을 줄바꿈으로 묶어 요청 수를 최소화. 줄 수가 어긋나면 해당 묶음만 개별 번역"""
+    translator = GoogleTranslator(source='auto', target=target)
+    results = {}
+    chunks, cur, size = [], [], 0
+    for t in texts:
+        if cur and size + len(t) + 1 > TRANSLATION_CHUNK_CHARS:
+            chunks.append(cur); cur, size = [], 0
+        cur.append(t); size += len(t) + 1
+    if cur: chunks.append(cur)
+
+    for chunk in chunks:
+        try:
+            with get_metrics().timer('translate'):
+                lines = translator.translate(TRANSLATION_SEP.join(chunk)).split(TRANSLATION_SEP)
+            if len(lines) == len(chunk):
+                results.update((src, dst.strip()) for src, dst in zip(chunk, lines) if dst.strip())
+                continue
+        except Exception as e: write_log(f"Translate Err: {e}")
+        get_metrics().inc('translate_fallback')
+        for src in chunk:
+            with get_metrics().guard('translate.single'): results[src] = translator.translate(src)
+    return results
+
+@singleton
+def get_translation_cache():
+    cache = TranslationCache()
+    atexit.register(cache.save)
+    return cache
+
+def translate_texts(texts, target='ko'):
+    """캐시 적중분은 바로 반환하고, 미적중분만 모아 한 번에 번역. 실패한 문장은 원문 유지"""
+    cache = get_translation_cache()
+    out = {}
+    misses = []
+    for t in dict.fromkeys(x.replace("\n", " ").strip() for x in texts if x):
+        hit = cache.get(t, target)
+        if hit is None: misses.append(t)
+        else: out[t] = hit
+    if misses:
+        translated = translate_batch(misses, target)
+        cache.put_many(translated.items(), target)
+        cache.save()
+        out.update(translated)
+    return [out.get(x.replace("\n", " ").strip(), x) if x else x for x in texts]
@@ -0,0 +1,44 @@
+"""[3-2] 백그라운드 워커 (단독 실행 / 분담 워커 / Streamlit 프로세스 안에서 한 번만 띄우기)"""
+import threading
+from .bot import create_bot, poll_bot
+from .cluster import run_worker
+from .config import load_config, start_config_refresher
+from .logs import write_log
+from .metrics import METRICS_PORT, get_metrics, start_metrics_server
+from .monitor import Monitor
+from .runtime import WORKER_MODE, singleton
+from .status import start_status_publisher
+
+def run_embedded():
+    """단독 실행: 봇 롱폴링 + 전 종목 감시 (봇 토큰이 없으면 바로 반환)"""
+    write_log("🤖 봇 시스템 시작...")
+    if METRICS_PORT:
+        with get_metrics().guard('metrics.server'): start_metrics_server(int(METRICS_PORT))
+    cfg = load_config()
+    token = cfg['telegram']['bot_token']
+    chat_id = cfg['telegram']['chat_id']
+    if not token:
+        write_log("⚠️ 봇 토큰 없음 - 설정 후 다시 시작하세요")
+        return
+
+    try:
+        bot = create_bot(token)
+        with get_metrics().guard('telegram.hello'): bot.send_message(chat_id, "🤖 DeBrief V55 가동\n아이콘 및 전체 기능 복구 완료.")
+
+        monitor = Monitor()
+        start_status_publisher()  # DEBRIEF_WORKER_MODE=off 로 따로 띄운 UI가 시세/계측을 읽도록
+        start_config_refresher()  # 그 UI에서 바꾼 설정(종목/옵션/토글)을 감시 루프가 반영하도록
+        t_mon = threading.Thread(target=monitor.run, daemon=True, name="DeBrief_Worker")
+        t_mon.start()
+        poll_bot(bot)
+
+    except Exception as e: write_log(f"Bot Error: {e}")
+
+@singleton
+def start_background_worker():
+    """UI 프로세스에서 WORKER_MODE에 맞는 워커를 한 번만 띄움 (rerun마다 불려도 두 번째부터는 아무 것도 안 함)"""
+    for t in threading.enumerate():
+        if t.name == "DeBrief_Worker": return
+    if WORKER_MODE == 'off': return  # 독립 워커(python -m debrief)가 감시/봇을 맡고 여기선 UI만
+    target = run_worker if WORKER_MODE == 'cluster' else run_embedded
+    threading.Thread(target=target, daemon=True, name="DeBrief_Worker").start()
@@ -0,0 +1,81 @@
+"""
+실시간 시세 스트림 재생 서버 (로컬 점검용)
+
+DEBRIEF_STREAM_RECORD 로 기록한 원본 메시지, 또는 직접 만든 틱 목록(JSON lines)을
+야후 스트리머와 같은 형식으로 재생한다. 클라이언트가 구독한 종목만 보낸다.
+
+    python stream_replay.py ticks.jsonl --port 8765 --speed 10
+    DEBRIEF_STREAM_URL=ws://localhost:8765 streamlit run app.py
+
+틱 목록 형식 (한 줄에 하나):
+    {"t": 1760000000.0, "raw": "<기록된 원본 메시지>"}
+    {"t": 0.5, "id": "TSLA", "price": 251.3, "previous_close": 240.0}
+"""
+import argparse
+import asyncio
+import base64
+import json
+import time
+from websockets.asyncio.server import serve
+from yfinance.pricing_pb2 import PricingData
+
+def encode_tick(tick):
+    """틱 dict -> 야후 스트리머 메시지(JSON 안의 base64 protobuf)"""
+    data = PricingData(id=tick['id'], price=tick['price'], time=int(tick.get('time', time.time()) * 1000))
+    if tick.get('previous_close'):
+        data.previous_close = tick['previous_close']
+        data.change = tick['price'] - tick['previous_close']
+        data.change_percent = data.change / tick['previous_close'] * 100
+    if 'change_percent' in tick: data.change_percent = tick['change_percent']
+    return json.dumps({"type": "pricing", "message": base64.b64encode(data.SerializeToString()).decode()})
+
+def load_ticks(path):
+    """(상대 시각, 종목, 메시지) 목록"""
+    ticks = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip(): continue
+            row = json.loads(line)
+            raw = row['raw'] if 'raw' in row else encode_tick(row)
+            symbol = row.get('id') or PricingData.FromString(base64.b64decode(json.loads(raw)['message'])).id
+            ticks.append((float(row.get('t', 0)), symbol, raw))
+    if not ticks: return ticks
+    start = min(t for t, _, _ in ticks)
+    return sorted((t - start, s, raw) for t, s, raw in ticks)
+
+async def replay(ws, ticks, speed, loop):
+    subscribed = set()
+
+    async def reader():
+        async for msg in ws:
+            req = json.loads(msg)
+            subscribed.update(req.get('subscribe', []))
+            subscribed.difference_update(req.get('unsubscribe', []))
+
+    task = asyncio.create_task(reader())
+    try:
+        while not subscribed: await asyncio.sleep(0.05)
+        while True:
+            began = time.monotonic()
+            for offset, symbol, raw in ticks:
+                if speed: await asyncio.sleep(max(0, offset / speed - (time.monotonic() - began)))
+                if symbol in subscribed: await ws.send(raw)
+            if not loop: break
+        await ws.wait_closed()
+    finally: task.cancel()
+
+async def main():
+    ap = argparse.ArgumentParser(description="DeBrief 시세 스트림 재생 서버")
+    ap.add_argument('ticks', help="틱 JSON lines 파일")
+    ap.add_argument('--host', default='localhost')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--speed', type=float, default=1.0, help="재생 배속 (0이면 대기 없이)")
+    ap.add_argument('--loop', action='store_true', help="끝나면 처음부터 반복")
+    args = ap.parse_args()
+    ticks = load_ticks(args.ticks)
+    async with serve(lambda ws: replay(ws, ticks, args.speed, args.loop), args.host, args.port):
+        print(f"📡 재생 서버 ws://{args.host}:{args.port} ({len(ticks)}틱)")
+        await asyncio.Future()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""prices: 급등락 알림 거래일 구분, RSI 상태 초기화"""
+import pandas as pd
+import pytest
+from debrief import prices
+from debrief.state import AlertState
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    st = AlertState(path=str(tmp_path / 'state.db'))
+    monkeypatch.setattr(prices, 'get_alert_state', lambda: st)
+    return st
+
+def test_move_alert_keyed_on_session_not_wall_clock(state):
+    # 금요일 +5.2% -> 주말/월요일 장전에도 스냅샷은 금요일 거래일이므로 다시 알리지 않음
+    assert prices.move_alert('NVDA', 5.2, 100.0, '2026-10-09')
+    for _ in range(3): assert prices.move_alert('NVDA', 5.2, 100.0, '2026-10-09') is None
+    # 같은 거래일 안에서는 한 단계 더 움직여야 다시 알림
+    assert prices.move_alert('NVDA', 5.9, 100.0, '2026-10-09') is None
+    assert prices.move_alert('NVDA', 6.3, 100.0, '2026-10-09')
+    # 새 거래일의 시세면 처음부터 다시 판정
+    assert prices.move_alert('NVDA', 3.1, 100.0, '2026-10-12')
+
+def test_snapshot_session_is_last_bar_date():
+    idx = pd.to_datetime(['2026-10-08', '2026-10-09'])
+    daily = pd.concat({'Close': pd.DataFrame({'NVDA': [100.0, 105.2], 'TSLA': [200.0, float('nan')]}, index=idx)}, axis=1)
+    snap = prices.build_snapshot(daily, pd.DataFrame())
+    assert snap.loc['NVDA', 'session'] == '2026-10-09'
+    assert snap.loc['TSLA', 'session'] == '2026-10-08'
+
+def test_session_day_uses_market_tz():
+    # 2026-10-10 02:00 UTC 는 뉴욕 기준 금요일(10-09) 밤
+    assert prices.session_day(pd.Timestamp('2026-10-10 02:00', tz='UTC').timestamp()) == '2026-10-09'
+    assert prices.session_day(pd.Timestamp('2026-10-10 02:00', tz='UTC')) == '2026-10-09'
+
+def test_rsi_seeds_tickers_once_they_have_closes():
+    # 첫 배치에 종가가 없던 종목(신규 상장/다운로드 실패)도 다음 배치에 봉이 들어오면 초기화돼 RSI가 나와야 함
+    idx = pd.bdate_range('2026-09-01', periods=30)
+    nvda = pd.Series([100.0 + i + (i % 3) * 2 for i in range(30)], index=idx)
+    rsi = prices.WilderRSI()
+    first = rsi.update(pd.DataFrame({'NVDA': nvda[:20], 'NEW': float('nan')}))
+    assert pd.notna(first['NVDA']) and pd.isna(first['NEW'])
+    assert 'NEW' not in rsi.state.index
+    new = nvda * 2
+    later = rsi.update(pd.DataFrame({'NVDA': nvda, 'NEW': new.where(idx >= idx[15])}))
+    expected = prices.compute_rsi(new[15:].to_frame('NEW')).iloc[-1]['NEW']
+    assert later['NEW'] == pytest.approx(expected)
+    assert later['NVDA'] == pytest.approx(prices.compute_rsi(nvda.to_frame('NVDA')).iloc[-1]['NVDA'])
+
+def test_rsi_reseeds_nan_state():
+    idx = pd.bdate_range('2026-09-01', periods=10)
+    close = pd.DataFrame({'NVDA': [float(100 + (i % 3)) for i in range(10)]}, index=idx)
+    rsi = prices.WilderRSI()
+    rsi.state = pd.DataFrame({'avg_gain': [float('nan')], 'avg_loss': [float('nan')], 'close': [float('nan')],
+                              'as_of': [idx[0]]}, index=['NVDA'])
+    assert rsi.update(close)['NVDA'] == pytest.approx(prices.compute_rsi(close).iloc[-1]['NVDA'])